@@ -90,6 +90,19 @@ DATABASES = {
     }
 }
 
+# The start metrics, the resource sampler (its series and the lock that lets
+# one worker sample per interval), container progress and the warm pool
+# counters all live in the default cache. The local memory cache only works
+# with a single server process; with several workers point this at a cache
+# they share, e.g.
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}.
+# `manage.py check --deploy` warns while it is process local.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -160,6 +173,146 @@ DEFAULT_FROM_EMAIL = ''
 # URL fetch settings
 URL_FETCH_MAX_LENGTH = 200
 
+# Docker daemons that run scenario containers. A host without base_url uses the
+# local environment (DOCKER_HOST or the default socket). Budget keys override the
+# HOST_* defaults below (cpu_cores, memory_mb, cpu_overcommit, max_containers), e.g.
+# 'lab-2': {'base_url': 'tcp://10.0.0.2:2376', 'tls': True, 'memory_mb': 65536}
+# Readiness probes go to the base_url host, or to 'probe_address' if set.
+# Students' desktop links use 'public_address' if set, else the probe address.
+DOCKER_HOSTS = {
+    'local': {'base_url': None},
+}
+DEFAULT_DOCKER_HOST = 'local'
+# least_loaded spreads students across hosts, bin_packing fills one host first
+DOCKER_PLACEMENT_POLICY = 'least_loaded'
+
+# Where scenario containers post structured progress (see fyp.py). Leave empty
+# to read progress from container logs instead. Containers reach the host as
+# host.docker.internal, e.g. 'http://host.docker.internal:8000/scenario/progress/'.
+# Progress is kept in the default cache, see CACHES.
+PROGRESS_INGEST_URL = ''
+PROGRESS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Container status lookups are shared for this many seconds per process. Past
+# that an entry may still be served for STATUS_CACHE_STALE seconds while one
+# background refresh runs (0 disables stale-while-revalidate).
+STATUS_CACHE_TTL = 2
+STATUS_CACHE_STALE = 10
+
+# Seconds the status endpoint tells pollers to wait while a container is
+# running, and while it is stopped, paused or completed
+STATUS_POLL_INTERVAL = 3
+STATUS_POLL_IDLE_INTERVAL = 15
+
+# Container status push over Server-Sent Events (needs the ASGI server).
+# Seconds between server-side checks, between keep-alive comments, and before
+# a stream is closed for the browser to reconnect. Containers that do not
+# report progress to PROGRESS_INGEST_URL have their logs read (and streams
+# without a container look for a new one) every STATUS_STREAM_LOG_INTERVAL.
+STATUS_STREAM_INTERVAL = 2
+STATUS_STREAM_HEARTBEAT = 15
+STATUS_STREAM_MAX_AGE = 300
+STATUS_STREAM_LOG_INTERVAL = 10
+
+# A started container is handed over once the desktop answers on its port:
+# 'http' expects a non-5xx reply to READINESS_PROBE_PATH, 'tcp' only a
+# connection (docker-proxy accepts those as soon as the port is published),
+# 'none' skips the probe. Probes back off from the initial to the max delay
+# (seconds) until READINESS_TIMEOUT.
+READINESS_PROBE = 'http'
+READINESS_PROBE_PATH = '/'
+READINESS_TIMEOUT = 30
+READINESS_PROBE_INITIAL_DELAY = 0.05
+READINESS_PROBE_MAX_DELAY = 1
+READINESS_PROBE_CONNECT_TIMEOUT = 2
+
+# Background sampling of docker stats for every student container. Series of
+# RESOURCE_SAMPLE_SIZE samples are kept in the default cache (see CACHES)
+# and rolled up into RESOURCE_ROLLUP_POINTS points when a container stops.
+RESOURCE_SAMPLER_ENABLED = True
+RESOURCE_SAMPLE_INTERVAL = 10
+RESOURCE_SAMPLE_SIZE = 360
+RESOURCE_ROLLUP_POINTS = 60
+RESOURCE_SERIES_TIMEOUT = 60 * 60 * 24
+
+# Bearer token for scraping /scenario/metrics/ (administrators can always
+# open it while logged in). Empty disables token access. The metrics are
+# aggregated in the default cache and cover every worker only when CACHES is
+# shared between them.
+METRICS_TOKEN = ''
+
+# 'docker' talks to the daemons above. 'fake' keeps containers in memory (per
+# process) so the container flows can be load-tested without Docker.
+CONTAINER_BACKEND = 'docker'
+# Fake backend tuning: seconds of latency per API call and per container boot,
+# share of calls that fail (optionally only the listed operations, e.g.
+# ['run', 'start']) or drop the connection, and the synthetic fyp.py progress
+# (progress_step percent every progress_interval seconds). Failures are drawn
+# from a seeded RNG so runs are repeatable. cpus and memory_mb are what each
+# fake host reports as its machine. A DOCKER_HOSTS entry can override any of
+# these for its own fake daemon under 'fake'.
+FAKE_DOCKER = {
+    'latency': 0.0,
+    'start_latency': 0.0,
+    'failure_rate': 0.0,
+    'disconnect_rate': 0.0,
+    'fail_operations': [],
+    'progress_step': 10,
+    'progress_interval': 30,
+    'cpus': 8,
+    'memory_mb': 16384,
+    'seed': 0,
+}
+
+# Docker client settings (one shared connection pool per host per process)
+DOCKER_POOL_SIZE = 10
+DOCKER_TIMEOUT = 60
+DOCKER_BATCH_WORKERS = 8
+
+# Answer container status lookups from a cache fed by the Docker events stream
+DOCKER_EVENTS_WATCHER = True
+
+# Number of idle, pre-started containers to keep per scenario image on each host.
+# e.g. {'cyberrange/kali-beginner:latest': 5}
+WARM_POOL_SIZES = {}
+WARM_POOL_DEFAULT_SIZE = 0
+
+# Concurrent image pulls for prepull_images and the scenario create/edit hook
+IMAGE_PULL_WORKERS = 3
+
+# Lifecycle reaper: containers running past Level.recommended_time plus the grace
+# period are paused, and stopped (or removed) after a second grace period
+REAPER_GRACE_MINUTES = 15
+REAPER_REMOVE_CONTAINERS = False
+
+# Container starts run in the background on this many threads per process
+CONTAINER_START_WORKERS = 4
+# Workers touch their running start jobs every START_JOB_HEARTBEAT seconds.
+# Jobs not touched for START_JOB_TIMEOUT seconds are failed, as their worker
+# is gone. Jobs queued longer than START_QUEUE_TIMEOUT are failed as well.
+START_JOB_HEARTBEAT = 15
+START_JOB_TIMEOUT = 4 * START_JOB_HEARTBEAT
+START_QUEUE_TIMEOUT = 30 * 60
+
+# Default per-host budget for admission control. Starts that do not fit on any
+# host wait in a FIFO queue. None takes the cores and memory each daemon
+# reports (docker info, cached for HOST_CAPACITY_CACHE_TIMEOUT seconds). The
+# CPU limits of a host's containers may add up to HOST_CPU_OVERCOMMIT times
+# its cores. DOCKER_HOSTS entries can override each of these, see above.
+HOST_CPU_CORES = None
+HOST_MEMORY_MB = None
+HOST_CPU_OVERCOMMIT = 2.0
+HOST_MAX_CONTAINERS = 30
+HOST_CAPACITY_CACHE_TIMEOUT = 5 * 60
+
+# Per-container resource limits by Level.difficulty
+CONTAINER_LIMITS = {
+    'beginner': {'cpus': 1.0, 'memory_mb': 2048},
+    'intermediate': {'cpus': 1.5, 'memory_mb': 3072},
+    'advanced': {'cpus': 2.0, 'memory_mb': 4096},
+    'default': {'cpus': 1.0, 'memory_mb': 2048},
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
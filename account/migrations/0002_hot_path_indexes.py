@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passwordresetrequest',
+            index=models.Index(fields=['user', 'pin', 'used'], name='passwordreset_pin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivationpin',
+            index=models.Index(fields=['pin'], name='useractivationpin_pin_idx'),
+        ),
+    ]
@@ -9,6 +9,11 @@ class PasswordResetRequest(models.Model):
     expires_at = models.DateTimeField()
     used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'pin', 'used'], name='passwordreset_pin_idx'),
+        ]
+
     def is_valid(self):
         return timezone.now() < self.expires_at and not self.used
 
@@ -19,6 +24,12 @@ class UserActivationPin(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # Activation links look the pin up without the user
+            models.Index(fields=['pin'], name='useractivationpin_pin_idx'),
+        ]
+
     def is_valid(self):
         return timezone.now() < self.expires_at
 
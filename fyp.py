@@ -1,7 +1,11 @@
 import tkinter as tk
 import subprocess
 import os
+import json
 import logging
+import queue
+import threading
+import urllib.request
 from tkinter import messagebox, filedialog
 
 
@@ -12,13 +16,51 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class ProgressReporter:
+    # Posts progress events to the CyberRange server when it started this
+    # container with PROGRESS_URL/PROGRESS_TOKEN. The log line is always written
+    # too, for servers that still read progress from the container logs.
+    def __init__(self):
+        self.url = os.environ.get('PROGRESS_URL')
+        self.token = os.environ.get('PROGRESS_TOKEN')
+        self.events = queue.Queue()
+        if self.url and self.token:
+            threading.Thread(target=self.send_events, daemon=True).start()
+
+    def report(self, progress=None, level=None):
+        if progress is not None:
+            logger.info(f"Progress: {int(progress)}")
+        if level is not None:
+            logger.info(f"Level: {level}")
+        if self.url and self.token:
+            self.events.put({'progress': None if progress is None else int(progress), 'level': level})
+
+    def send_events(self):
+        # One sender thread keeps the events in order and never blocks the UI
+        while True:
+            event = self.events.get()
+            request = urllib.request.Request(
+                self.url,
+                data=json.dumps(event).encode('utf-8'),
+                headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {self.token}'},
+                method='POST'
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                logger.error(f"Error reporting progress: {e}")
+
+
+reporter = ProgressReporter()
+
+
 class NotepadManager:
     def __init__(self, filepath):
         self.filepath = filepath
         self.index = 0
         self.paragraphs = self.load_instructions()
         self.process = None
-        logger.info("Progress: 0")
+        reporter.report(progress=0)
 
     def load_instructions(self):
         with open(self.filepath, 'r') as file:
@@ -52,7 +94,7 @@ class NotepadManager:
 
     def reset(self):
         self.index = 0
-        logger.info("Progress: 0")
+        reporter.report(progress=0)
 
 
 class PercentageWindow(tk.Toplevel):
@@ -73,25 +115,25 @@ class PercentageWindow(tk.Toplevel):
                 self.percentage = 100
             self.label.config(text=f"{self.percentage}%")
             
-            logger.info(f"Progress: {int(self.percentage)}")
+            reporter.report(progress=self.percentage)
 
     def decrease_percentage(self, decrement=5):
         if self.percentage > 0:
             self.percentage -= decrement
             self.label.config(text=f"{self.percentage}%")
             
-            logger.info(f"Progress: {int(self.percentage)}")
+            reporter.report(progress=self.percentage)
 
     def reset(self):
         self.percentage = 0
         self.label.config(text="0%")
-        logger.info("Progress: 0")
+        reporter.report(progress=0)
 
     def on_close(self):
         if self.percentage < 100:
             messagebox.showwarning("Warning", "You cannot close this window until the percentage is 100%")
         else:
-            logger.info("Progress: 100")
+            reporter.report(progress=100)
             self.destroy()
 
 
@@ -140,13 +182,13 @@ class Application(tk.Tk):
     def start_beginner(self):
         instruction_file = self.find_instruction_file("beginnerInstruction.txt")  # Changed here
         if instruction_file:
-            logger.info("Level: Beginner")
+            reporter.report(level="Beginner")
             self.start_instruction(instruction_file, increment=10)
 
     def start_advanced(self):
         instruction_file = self.find_instruction_file("advancedInstruction.txt")  # Changed here
         if instruction_file:
-            logger.info("Level: Advanced") 
+            reporter.report(level="Advanced") 
             self.start_instruction(instruction_file, increment=20)
 
     def start_instruction(self, filename, increment):
@@ -159,7 +201,7 @@ class Application(tk.Tk):
             self.percentage_window.reset()
             
             
-            logger.info(f"Progress: 0")
+            reporter.report(progress=0)
 
         except Exception as e:
             logger.error(f"Error: {str(e)}")
@@ -181,7 +223,7 @@ class Application(tk.Tk):
                 self.percentage_window.decrease_percentage(decrement)
 
     def on_instruction_complete(self):
-        logger.info("Progress: 100")
+        reporter.report(progress=100)
         messagebox.showinfo("Completion", "You have completed the instructions!")
         self.beginner_button.config(state=tk.NORMAL)
         self.advanced_button.config(state=tk.NORMAL)
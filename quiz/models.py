@@ -35,6 +35,10 @@ class QuizAttempt(models.Model):
 
     class Meta:
         ordering = ['-completed_at']
+        indexes = [
+            # Latest attempt of a user for a quiz
+            models.Index(fields=['user', 'quiz', '-completed_at'], name='quizattempt_user_quiz_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - Score: {self.score}/{self.total_questions}"
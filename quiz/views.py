@@ -181,9 +181,12 @@ def submit_quiz(request, scenario_id):
 
             if user_scenario and user_scenario.container_id:
                 try:
+                    from scenario.jobs import dispatch_queued_jobs
                     from scenario.utils import DockerManager
-                    docker_manager = DockerManager()
+                    docker_manager = DockerManager(user_scenario.docker_host)
                     docker_manager.stop_container(user_scenario.container_id)
+                    user_scenario.record_stopped()
+                    dispatch_queued_jobs()
                 except Exception as e:
                     print(f"Error stopping container: {e}")
 
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rating', '0001_initial'),
+        ('scenario', '0011_instructorstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scenariorating',
+            index=models.Index(fields=['scenario', 'rating'], name='scenariorating_rating_idx'),
+        ),
+    ]
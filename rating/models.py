@@ -24,6 +24,10 @@ class ScenarioRating(BaseRating):
 
     class Meta:
         unique_together = ('user', 'scenario')
+        indexes = [
+            # Rating distribution in the scenario analytics
+            models.Index(fields=['scenario', 'rating'], name='scenariorating_rating_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.scenario.name} - {self.rating} stars"
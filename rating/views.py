@@ -91,12 +91,15 @@ def rate_content(request, scenario_id):
 
         if user_scenario and user_scenario.container_id:
             try:
+                from scenario.jobs import dispatch_queued_jobs
                 from scenario.utils import DockerManager
-                docker_manager = DockerManager()
+                docker_manager = DockerManager(user_scenario.docker_host)
                 docker_manager.remove_container(user_scenario.container_id)
                 user_scenario.container_id = None
                 user_scenario.port = None
                 user_scenario.save()
+                user_scenario.record_stopped()
+                dispatch_queued_jobs()
             except Exception as e:
                 print(f"Error removing container after rating: {e}")
 
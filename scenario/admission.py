@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ContainerStartJob, Level, PortReservation, UserScenario
+from .utils import DockerManager, resolve_host
+from .warm_pool import WARM_PREFIX
+
+
+STARTING_PHASES = ('creating', 'starting')
+
+
+def limits_for_difficulty(difficulty):
+    return settings.CONTAINER_LIMITS.get(difficulty, settings.CONTAINER_LIMITS['default'])
+
+
+def limits_for(scenario):
+    difficulty = Level.objects.filter(scenario=scenario).values_list('difficulty', flat=True).first()
+    return limits_for_difficulty(difficulty)
+
+
+def host_capacity(host):
+    # What the daemon reports about its own machine, cached for all workers.
+    # An unreachable daemon is unavailable until the next check.
+    key = f'admission:capacity:{host}'
+    capacity = cache.get(key)
+    if capacity is None:
+        try:
+            info = DockerManager(host).client.info()
+            capacity = {
+                'available': True,
+                'cpus': info['NCPU'],
+                'memory_mb': info['MemTotal'] // (1024 * 1024),
+            }
+            timeout = settings.HOST_CAPACITY_CACHE_TIMEOUT
+        except Exception as e:
+            print(f"Error reading capacity of Docker host {host}: {e}")
+            capacity = {'available': False, 'cpus': 0, 'memory_mb': 0}
+            timeout = 30
+        cache.set(key, capacity, timeout=timeout)
+    return capacity
+
+
+def host_budget(host):
+    config = settings.DOCKER_HOSTS.get(host, {})
+    cpus = config.get('cpu_cores', settings.HOST_CPU_CORES)
+    memory_mb = config.get('memory_mb', settings.HOST_MEMORY_MB)
+    available = True
+    if cpus is None or memory_mb is None:
+        capacity = host_capacity(host)
+        available = capacity['available']
+        cpus = capacity['cpus'] if cpus is None else cpus
+        memory_mb = capacity['memory_mb'] if memory_mb is None else memory_mb
+    return {
+        'available': available,
+        'containers': config.get('max_containers', settings.HOST_MAX_CONTAINERS),
+        # CPU limits are ceilings, not reservations, so they may add up to more than the cores
+        'cpus': cpus * config.get('cpu_overcommit', settings.HOST_CPU_OVERCOMMIT),
+        'memory_mb': memory_mb,
+    }
+
+
+def current_usage():
+    ContainerStartJob.expire_stale()
+    # Stopped containers keep their id until removed but use nothing. An empty
+    # state predates state tracking and is counted to be safe.
+    running = UserScenario.objects.filter(
+        container_id__isnull=False
+    ).exclude(
+        last_known_state='stopped'
+    ).exclude(
+        start_jobs__phase__in=STARTING_PHASES
+    ).values_list('docker_host', 'scenario__level__difficulty')
+    starting = ContainerStartJob.objects.filter(
+        phase__in=STARTING_PHASES
+    ).values_list('user_scenario__docker_host', 'user_scenario__scenario__level__difficulty')
+    # Idle warm pool containers, known by their reservations until handed over
+    warm = PortReservation.objects.filter(
+        container_name__startswith=WARM_PREFIX
+    ).values_list('docker_host', flat=True)
+
+    usage = {host: {'containers': 0, 'cpus': 0.0, 'memory_mb': 0} for host in settings.DOCKER_HOSTS}
+    for host, difficulty in list(running) + list(starting) + [(host, None) for host in warm]:
+        host = resolve_host(host)
+        if host in usage:
+            add_usage(usage[host], limits_for_difficulty(difficulty))
+    return usage
+
+
+def add_usage(usage, limits):
+    usage['containers'] += 1
+    usage['cpus'] += limits['cpus']
+    usage['memory_mb'] += limits['memory_mb']
+
+
+def fits(usage, limits, budget):
+    if not budget['available']:
+        # Whatever its usage, nothing can start on a daemon that does not answer
+        return False
+    if usage['containers'] == 0:
+        # Never block forever on a container larger than the whole budget
+        return True
+    return (
+        usage['containers'] + 1 <= budget['containers']
+        and usage['cpus'] + limits['cpus'] <= budget['cpus']
+        and usage['memory_mb'] + limits['memory_mb'] <= budget['memory_mb']
+    )
+
+
+def choose_host(usage, limits, pinned=None, exclude=()):
+    # A student's existing container only starts on the host it lives on, so
+    # a pinned start waits for room there instead of moving
+    if pinned and resolve_host(pinned) in usage:
+        host = resolve_host(pinned)
+        return host if fits(usage[host], limits, host_budget(host)) else None
+    candidates = [
+        host for host in usage
+        if host not in exclude and fits(usage[host], limits, host_budget(host))
+    ]
+    if not candidates:
+        return None
+
+    def load(host):
+        return usage[host]['memory_mb'] / max(host_budget(host)['memory_mb'], 1)
+
+    if settings.DOCKER_PLACEMENT_POLICY == 'bin_packing':
+        return max(candidates, key=load)
+    return min(candidates, key=load)
+
+
+def queue_position(job):
+    if job.phase != 'queued':
+        return 0
+    return ContainerStartJob.objects.filter(phase='queued', created_at__lt=job.created_at).count() + 1
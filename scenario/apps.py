@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+
+def start_resource_sampler(**kwargs):
+    from .utils import resource_sampler
+    resource_sampler.ensure_started()
 
 
 class ScenarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scenario'
+
+    def ready(self):
+        from . import checks, signals
+
+        # The resource sampler runs in every server process from its first
+        # request on, but not in management commands
+        if settings.RESOURCE_SAMPLER_ENABLED:
+            request_started.connect(start_resource_sampler, dispatch_uid='scenario.start_resource_sampler')
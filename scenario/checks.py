@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # Metrics, the sampler lock and progress records are shared through the
+    # default cache, which every server process must see
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            'The default cache is local to each process.',
+            hint='Start metrics, resource sampling and container progress are only shared '
+                 'between server processes through a cache they all reach (Redis, Memcached).',
+            obj='CACHES',
+            id='scenario.W001',
+        )]
+    return []
@@ -0,0 +1,471 @@
+import hashlib
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from docker import errors
+from requests.exceptions import ConnectionError as DockerConnectionError
+
+
+# In-memory stand-in for the part of the docker-py client the scenario app
+# uses (containers.get/list/run, container lifecycle calls, api.logs/stats,
+# events, images). Selected with CONTAINER_BACKEND = 'fake' so the Django
+# side of container management can be exercised and benchmarked without a
+# daemon. Behaviour is tuned through FAKE_DOCKER, see settings.py.
+
+_daemons = {}
+_daemons_lock = threading.Lock()
+
+
+def _docker_time(seconds):
+    stamp = datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+    return stamp.strftime('%Y-%m-%dT%H:%M:%S') + f'.{int(seconds % 1 * 1e9):09d}Z'
+
+
+def get_daemon(host):
+    with _daemons_lock:
+        if host not in _daemons:
+            # A DOCKER_HOSTS entry may tune its own fake daemon under 'fake'
+            config = dict(settings.FAKE_DOCKER, **settings.DOCKER_HOSTS.get(host, {}).get('fake', {}))
+            _daemons[host] = FakeDaemon(host, config)
+        return _daemons[host]
+
+
+def reset_daemons():
+    with _daemons_lock:
+        _daemons.clear()
+
+
+class FakeDaemon:
+    # Shared state of one fake Docker host. Every client for the host talks to
+    # the same daemon, so containers survive a client reset just like they do
+    # on a real daemon.
+    def __init__(self, host, config):
+        self.host = host
+        self.latency = config.get('latency', 0.0)
+        self.start_latency = config.get('start_latency', 0.0)
+        self.failure_rate = config.get('failure_rate', 0.0)
+        self.disconnect_rate = config.get('disconnect_rate', 0.0)
+        self.fail_operations = set(config.get('fail_operations') or [])
+        self.progress_step = config.get('progress_step', 10)
+        self.progress_interval = config.get('progress_interval', 30)
+        self.level = config.get('level', 'Beginner')
+        self.cpus = config.get('cpus', 8)
+        self.memory_mb = config.get('memory_mb', 16384)
+        self.random = random.Random(f"{config.get('seed', 0)}:{host}")
+        self.containers = {}
+        self.images = set(config.get('images') or [])
+        self.subscribers = []
+        self.counter = 0
+        self.lock = threading.RLock()
+
+    def call(self, operation):
+        # Every API call pays the configured latency and may fail on purpose
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_operations and operation not in self.fail_operations:
+            return
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.disconnect_rate:
+            raise DockerConnectionError(f'Injected connection failure in {operation}')
+        if roll < self.disconnect_rate + self.failure_rate:
+            raise errors.APIError(f'Injected failure in {operation}')
+
+    def new_id(self):
+        with self.lock:
+            self.counter += 1
+            return hashlib.sha256(f'{self.host}:{self.counter}'.encode()).hexdigest()
+
+    def find(self, id_or_name):
+        with self.lock:
+            if id_or_name in self.containers:
+                return self.containers[id_or_name]
+            for record in self.containers.values():
+                if record['id'] == id_or_name or record['name'] == id_or_name.lstrip('/') \
+                        or (len(id_or_name) >= 12 and record['id'].startswith(id_or_name)):
+                    return record
+        raise errors.NotFound(f'No such container: {id_or_name}')
+
+    def emit(self, record, action):
+        now = time.time()
+        event = {
+            'Type': 'container',
+            'Action': action,
+            'status': action,
+            'id': record['id'],
+            'Actor': {'ID': record['id'], 'Attributes': dict(record['labels'], name=record['name'])},
+            'time': int(now),
+            'timeNano': int(now * 1e9),
+        }
+        for subscriber in list(self.subscribers):
+            subscriber.put(event)
+
+    def port_in_use(self, port, exclude=None):
+        return any(
+            record['port'] == port and record['running'] and record['id'] != exclude
+            for record in self.containers.values()
+        )
+
+    def log_lines(self, record):
+        # Synthetic fyp.py output: the level, then one progress line per interval
+        if not record['progress_started']:
+            return []
+        start = record['progress_started']
+        end = time.time() if record['running'] else record['stopped_at']
+        lines = [(start, f'Level: {self.level}'), (start, 'Progress: 0')]
+        step = 1
+        while self.progress_interval > 0 and step * self.progress_step <= 100:
+            at = start + step * self.progress_interval
+            if at > end:
+                break
+            lines.append((at, f'Progress: {step * self.progress_step}'))
+            step += 1
+        return lines
+
+
+class FakeContainer:
+    # Like docker-py, the attributes are a snapshot taken when the container
+    # was fetched and only refreshed by reload()
+    def __init__(self, daemon, record, sparse=False):
+        self.daemon = daemon
+        self.id = record['id']
+        self.sparse = sparse
+        self.snapshot = self._copy(record)
+
+    def _copy(self, record):
+        with self.daemon.lock:
+            return dict(record, labels=dict(record['labels']), host_config=dict(record['host_config']))
+
+    @property
+    def record(self):
+        return self.daemon.find(self.id)
+
+    @property
+    def name(self):
+        return self.snapshot['name']
+
+    @property
+    def labels(self):
+        return dict(self.snapshot['labels'])
+
+    @property
+    def status(self):
+        return self._status(self.snapshot)
+
+    @property
+    def ports(self):
+        record = self.snapshot
+        if not record['running']:
+            return {}
+        return {'3000/tcp': [{'HostIp': '0.0.0.0', 'HostPort': str(record['port'])}]}
+
+    @property
+    def attrs(self):
+        record = self.snapshot
+        if self.sparse:
+            return {
+                'Id': record['id'],
+                'Names': [f"/{record['name']}"],
+                'State': self._status(record),
+                'Labels': dict(record['labels']),
+            }
+        return {
+            'Id': record['id'],
+            'Name': f"/{record['name']}",
+            'State': {
+                'Status': self._status(record),
+                'Running': record['running'],
+                'Paused': record['paused'],
+                'StartedAt': _docker_time(record['started_at']) if record['started_at'] else '0001-01-01T00:00:00Z',
+            },
+            'Config': {'Image': record['image'], 'Labels': dict(record['labels'])},
+            'HostConfig': dict(
+                record['host_config'],
+                PortBindings={'3000/tcp': [{'HostIp': '', 'HostPort': str(record['port'])}]} if record['port'] else {},
+            ),
+            'NetworkSettings': {'Ports': self.ports},
+        }
+
+    def _status(self, record):
+        if record['paused']:
+            return 'paused'
+        if record['running']:
+            return 'running'
+        return 'exited' if record['started_at'] else 'created'
+
+    def reload(self):
+        self.daemon.call('reload')
+        self.snapshot = self._copy(self.record)
+
+    def start(self):
+        self.daemon.call('start')
+        with self.daemon.lock:
+            record = self.record
+            if record['running']:
+                return
+            if self.daemon.port_in_use(record['port'], exclude=record['id']):
+                raise errors.APIError(f"Bind for 0.0.0.0:{record['port']} failed: port is already allocated")
+        if self.daemon.start_latency:
+            time.sleep(self.daemon.start_latency)
+        with self.daemon.lock:
+            record['running'] = True
+            record['paused'] = False
+            record['started_at'] = time.time()
+            record['progress_started'] = record['progress_started'] or record['started_at']
+            self.daemon.emit(record, 'start')
+
+    def stop(self, **kwargs):
+        self.daemon.call('stop')
+        with self.daemon.lock:
+            record = self.record
+            if record['running']:
+                record['running'] = False
+                record['paused'] = False
+                record['stopped_at'] = time.time()
+                self.daemon.emit(record, 'die')
+                self.daemon.emit(record, 'stop')
+
+    def pause(self):
+        self.daemon.call('pause')
+        with self.daemon.lock:
+            record = self.record
+            if not record['running']:
+                raise errors.APIError(f'Container {self.id} is not running')
+            record['paused'] = True
+            self.daemon.emit(record, 'pause')
+
+    def unpause(self):
+        self.daemon.call('unpause')
+        with self.daemon.lock:
+            record = self.record
+            if not record['paused']:
+                raise errors.APIError(f'Container {self.id} is not paused')
+            record['paused'] = False
+            self.daemon.emit(record, 'unpause')
+
+    def restart(self, **kwargs):
+        self.daemon.call('restart')
+        with self.daemon.lock:
+            record = self.record
+            record['running'] = True
+            record['paused'] = False
+            record['started_at'] = time.time()
+            record['progress_started'] = record['progress_started'] or record['started_at']
+            self.daemon.emit(record, 'restart')
+
+    def remove(self, force=False, **kwargs):
+        self.daemon.call('remove')
+        with self.daemon.lock:
+            record = self.record
+            if record['running'] and not force:
+                raise errors.APIError(f'You cannot remove a running container {self.id}. Stop the container before attempting removal or force remove')
+            del self.daemon.containers[record['id']]
+            self.daemon.emit(record, 'destroy')
+
+    def rename(self, name):
+        self.daemon.call('rename')
+        with self.daemon.lock:
+            if any(record['name'] == name for record in self.daemon.containers.values()):
+                raise errors.APIError(f'Conflict. The container name "/{name}" is already in use')
+            record = self.record
+            record['name'] = name
+            self.daemon.emit(record, 'rename')
+
+    def update(self, **kwargs):
+        self.daemon.call('update')
+        with self.daemon.lock:
+            self.record['host_config'].update(kwargs)
+
+
+class FakeContainerCollection:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def get(self, container_id):
+        self.daemon.call('get')
+        return FakeContainer(self.daemon, self.daemon.find(container_id))
+
+    def list(self, all=False, sparse=False, filters=None):
+        self.daemon.call('list')
+        filters = filters or {}
+        labels = filters.get('label', [])
+        labels = [labels] if isinstance(labels, str) else labels
+        ids = filters.get('id', [])
+        ids = [ids] if isinstance(ids, str) else ids
+        statuses = filters.get('status', [])
+        statuses = [statuses] if isinstance(statuses, str) else statuses
+
+        containers = []
+        with self.daemon.lock:
+            records = list(self.daemon.containers.values())
+        for record in records:
+            container = FakeContainer(self.daemon, record, sparse=sparse)
+            status = container._status(record)
+            if not all and not statuses and not record['running']:
+                continue
+            if statuses and status not in statuses:
+                continue
+            if ids and not any(record['id'].startswith(prefix) for prefix in ids):
+                continue
+            if any(not self._label_matches(record, label) for label in labels):
+                continue
+            containers.append(container)
+        return containers
+
+    def _label_matches(self, record, label):
+        key, _, value = label.partition('=')
+        if key not in record['labels']:
+            return False
+        return not value or record['labels'][key] == value
+
+    def run(self, image, name=None, ports=None, labels=None, detach=True, **kwargs):
+        self.daemon.call('run')
+        port = int(next(iter((ports or {}).values()), 0) or 0)
+        with self.daemon.lock:
+            self.daemon.images.add(image)
+            if name and any(record['name'] == name for record in self.daemon.containers.values()):
+                raise errors.APIError(f'Conflict. The container name "/{name}" is already in use')
+            record = {
+                'id': self.daemon.new_id(),
+                'name': name,
+                'image': image,
+                'port': port,
+                'labels': dict(labels or {}),
+                'environment': dict(kwargs.get('environment') or {}),
+                'host_config': {
+                    key: kwargs[key] for key in ('cpu_period', 'cpu_quota', 'mem_limit', 'memswap_limit') if key in kwargs
+                },
+                'running': False,
+                'paused': False,
+                'started_at': None,
+                'stopped_at': None,
+                'progress_started': None,
+            }
+            record['name'] = record['name'] or record['id'][:12]
+            self.daemon.containers[record['id']] = record
+            self.daemon.emit(record, 'create')
+        container = FakeContainer(self.daemon, record)
+        try:
+            container.start()
+        except Exception:
+            with self.daemon.lock:
+                self.daemon.containers.pop(record['id'], None)
+            raise
+        return FakeContainer(self.daemon, container.record)
+
+
+class FakeImage:
+    def __init__(self, name):
+        digest = hashlib.sha256(name.encode()).hexdigest()
+        self.id = f'sha256:{digest}'
+        self.attrs = {
+            'RepoDigests': [f"{name.split(':')[0]}@sha256:{digest}"],
+            'Size': 512 * 1024 * 1024,
+        }
+
+
+class FakeRegistryData:
+    def __init__(self, name):
+        self.id = f"sha256:{hashlib.sha256(name.encode()).hexdigest()}"
+
+
+class FakeImageCollection:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def get(self, name):
+        self.daemon.call('image_get')
+        if name not in self.daemon.images:
+            raise errors.ImageNotFound(f'No such image: {name}')
+        return FakeImage(name)
+
+    def pull(self, name, **kwargs):
+        self.daemon.call('pull')
+        with self.daemon.lock:
+            self.daemon.images.add(name)
+        return FakeImage(name)
+
+    def get_registry_data(self, name):
+        self.daemon.call('registry_data')
+        return FakeRegistryData(name)
+
+
+class FakeAPIClient:
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def logs(self, container_id, timestamps=False, since=None, tail='all', **kwargs):
+        self.daemon.call('logs')
+        lines = self.daemon.log_lines(self.daemon.find(container_id))
+        if since is not None:
+            lines = [(at, message) for at, message in lines if at >= since]
+        if tail != 'all':
+            lines = lines[-int(tail):] if int(tail) else []
+        if timestamps:
+            return ''.join(f'{_docker_time(at)} {message}\n' for at, message in lines).encode()
+        return ''.join(f'{message}\n' for at, message in lines).encode()
+
+    def stats(self, container_id, stream=False, **kwargs):
+        self.daemon.call('stats')
+        record = self.daemon.find(container_id)
+        memory = 256 * 1024 * 1024 if record['running'] else 0
+        busy = 50_000_000 if record['running'] and not record['paused'] else 0
+        # Some jitter and traffic that grows with uptime, for the sparklines
+        with self.daemon.lock:
+            jitter = self.daemon.random.random()
+        uptime = time.time() - record['started_at'] if record['running'] and record['started_at'] else 0
+        return {
+            'cpu_stats': {'cpu_usage': {'total_usage': 1_000_000_000 + int(busy * (0.5 + jitter))},
+                          'system_cpu_usage': 2_000_000_000, 'online_cpus': 2},
+            'precpu_stats': {'cpu_usage': {'total_usage': 1_000_000_000}, 'system_cpu_usage': 1_000_000_000},
+            'memory_stats': {'usage': int(memory * (0.9 + jitter / 5)), 'stats': {'inactive_file': 0}},
+            'networks': {'eth0': {'rx_bytes': int(uptime * 20_000), 'tx_bytes': int(uptime * 5_000)}},
+            'blkio_stats': {'io_service_bytes_recursive': [
+                {'op': 'read', 'value': int(uptime * 1_000)},
+                {'op': 'write', 'value': int(uptime * 4_000)},
+            ]},
+        }
+
+
+class FakeDockerClient:
+    def __init__(self, host):
+        self.daemon = get_daemon(host)
+        self.containers = FakeContainerCollection(self.daemon)
+        self.images = FakeImageCollection(self.daemon)
+        self.api = FakeAPIClient(self.daemon)
+
+    def ping(self):
+        self.daemon.call('ping')
+        return True
+
+    def info(self):
+        self.daemon.call('info')
+        return {'NCPU': self.daemon.cpus, 'MemTotal': self.daemon.memory_mb * 1024 * 1024}
+
+    def events(self, decode=True, since=None, until=None, filters=None):
+        filters = filters or {}
+        actions = set(filters.get('event') or [])
+        container = filters.get('container')
+        subscriber = queue.Queue()
+        with self.daemon.lock:
+            self.daemon.subscribers.append(subscriber)
+        try:
+            while True:
+                try:
+                    event = subscriber.get(timeout=None if until is None else max(0, until - time.time()))
+                except queue.Empty:
+                    return
+                if container and event['id'] != container:
+                    continue
+                if not actions or event['Action'] in actions:
+                    yield event
+        finally:
+            with self.daemon.lock:
+                self.daemon.subscribers.remove(subscriber)
+
+    def close(self):
+        pass
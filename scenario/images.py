@@ -0,0 +1,65 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .utils import get_docker_client, resolve_host
+
+
+def image_is_current(client, image_name):
+    try:
+        local = client.images.get(image_name)
+    except Exception:
+        return False
+
+    try:
+        remote_digest = client.images.get_registry_data(image_name).id
+    except Exception:
+        # Locally built or registry unreachable, the local copy is all we have
+        return True
+    return any(digest.endswith(remote_digest) for digest in local.attrs.get('RepoDigests', []))
+
+
+def pull_image(image_name, host=None):
+    result = {
+        'image': image_name,
+        'host': resolve_host(host),
+        'digest': None,
+        'size': None,
+        'duration': 0.0,
+        'skipped': False,
+        'error': None,
+    }
+    start = time.perf_counter()
+    try:
+        client = get_docker_client(host)
+        if image_is_current(client, image_name):
+            image = client.images.get(image_name)
+            result['skipped'] = True
+        else:
+            image = client.images.pull(image_name)
+        repo_digests = image.attrs.get('RepoDigests') or []
+        result['digest'] = repo_digests[0].split('@')[-1] if repo_digests else image.id
+        result['size'] = image.attrs.get('Size')
+    except Exception as e:
+        result['error'] = str(e)
+    result['duration'] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def prepull_images(image_names, max_workers=None):
+    image_names = sorted({image_name for image_name in image_names if image_name})
+    # Any host may be picked for a start, so each one needs its own copy
+    pulls = [(image_name, host) for host in settings.DOCKER_HOSTS for image_name in image_names]
+    with ThreadPoolExecutor(max_workers=max_workers or settings.IMAGE_PULL_WORKERS) as executor:
+        return list(executor.map(lambda pull: pull_image(*pull), pulls))
+
+
+def prepull_images_async(image_names):
+    def worker():
+        for result in prepull_images(image_names):
+            if result['error']:
+                print(f"Error pulling image {result['image']} on {result['host']}: {result['error']}")
+
+    threading.Thread(target=worker, name='image-prepull', daemon=True).start()
@@ -0,0 +1,248 @@
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import admission
+from .metrics import StartTimer
+from .models import ContainerStartJob, UserScenario
+from .utils import DockerManager, resolve_host
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.CONTAINER_START_WORKERS,
+                    thread_name_prefix='container-start',
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def submit_start_job(user_scenario, dispatch=True):
+    ContainerStartJob.expire_stale()
+    job = user_scenario.start_jobs.filter(phase__in=ContainerStartJob.ACTIVE_PHASES).first()
+    if job:
+        if dispatch and job.phase == 'queued':
+            # Queued jobs of a restarted process are only picked up by a dispatch
+            transaction.on_commit(dispatch_queued_jobs)
+        return job
+
+    job = ContainerStartJob.objects.create(user_scenario=user_scenario)
+    if dispatch:
+        transaction.on_commit(dispatch_queued_jobs)
+    return job
+
+
+def provision_students(scenario, students):
+    # Pre-start the scenario for a whole class. The starts join the same FIFO
+    # queue as students' own clicks, so the host budget and the start worker
+    # pool bound how many run at once.
+    students = list(students)
+    completed = set(UserScenario.objects.filter(
+        scenario=scenario,
+        user__in=students,
+        completed_at__isnull=False
+    ).values_list('user_id', flat=True))
+
+    user_scenarios = []
+    for student in students:
+        if student.id in completed:
+            continue
+        user_scenario, created = UserScenario.objects.get_or_create(
+            scenario=scenario,
+            user=student,
+            completed_at__isnull=True,
+            defaults={'container_id': None, 'port': None}
+        )
+        user_scenarios.append(user_scenario)
+
+    # Students whose container is already up are left alone
+    by_host = defaultdict(list)
+    for user_scenario in user_scenarios:
+        if user_scenario.container_id:
+            by_host[user_scenario.docker_host].append(user_scenario.container_id)
+    running = set()
+    for host, container_ids in by_host.items():
+        try:
+            statuses = DockerManager(host).get_container_statuses(container_ids)
+        except Exception as e:
+            print(f"Error checking containers on {host} before provisioning: {e}")
+            continue
+        running.update(
+            container_id for container_id, status in statuses.items()
+            if status['status'] == 'success' and status['container_status']['is_running']
+        )
+
+    jobs = []
+    with transaction.atomic():
+        for user_scenario in user_scenarios:
+            if user_scenario.container_id not in running:
+                jobs.append(submit_start_job(user_scenario, dispatch=False))
+        transaction.on_commit(dispatch_queued_jobs)
+    return jobs
+
+
+def provision_progress(scenario, students):
+    # One row per student with the state of their latest start job
+    user_scenarios = {
+        user_scenario.user_id: user_scenario
+        for user_scenario in UserScenario.objects.filter(
+            scenario=scenario,
+            user__in=students,
+            completed_at__isnull=True
+        )
+    }
+    latest_jobs = {}
+    for job in ContainerStartJob.objects.filter(
+        user_scenario__in=user_scenarios.values()
+    ).order_by('user_scenario_id', '-created_at'):
+        latest_jobs.setdefault(job.user_scenario_id, job)
+    queued = list(ContainerStartJob.objects.filter(phase='queued').order_by('created_at').values_list('id', flat=True))
+    positions = {job_id: index + 1 for index, job_id in enumerate(queued)}
+
+    rows = []
+    for student in students:
+        user_scenario = user_scenarios.get(student.id)
+        job = latest_jobs.get(user_scenario.id) if user_scenario else None
+        rows.append({
+            'student': student.username,
+            'phase': job.phase if job else ('ready' if user_scenario and user_scenario.container_id else 'not_started'),
+            'queue_position': positions.get(job.id, 0) if job else 0,
+            'error': job.error if job else '',
+            'container_id': user_scenario.container_id[:12] if user_scenario and user_scenario.container_id else None,
+            'port': user_scenario.port if user_scenario else None,
+            'docker_host': user_scenario.docker_host if user_scenario else None,
+        })
+    return rows
+
+
+def dispatch_queued_jobs():
+    # Admit queued starts in FIFO order while they fit the host budget. Only a
+    # student waiting for the host that holds their container is passed over.
+    admitted = []
+    ContainerStartJob.expire_stale()
+    with transaction.atomic():
+        queued = ContainerStartJob.objects.select_for_update().filter(
+            phase='queued'
+        ).select_related('user_scenario__scenario').order_by('created_at')
+        queued = list(queued)
+        if not queued:
+            return
+
+        usage = admission.current_usage()
+        # Hosts kept for a student waiting on their existing container
+        held = set()
+        for job in queued:
+            user_scenario = job.user_scenario
+            limits = admission.limits_for(user_scenario.scenario)
+            if user_scenario.container_id:
+                host = None
+                if resolve_host(user_scenario.docker_host) not in held:
+                    host = admission.choose_host(usage, limits, pinned=user_scenario.docker_host)
+                if host is None:
+                    held.add(resolve_host(user_scenario.docker_host))
+                    continue
+            else:
+                host = admission.choose_host(usage, limits, exclude=held)
+                if host is None:
+                    break
+            admission.add_usage(usage[host], limits)
+            user_scenario.docker_host = host
+            user_scenario.save(update_fields=['docker_host'])
+            job.set_phase('creating')
+            admitted.append((job.pk, limits))
+
+    for job_id, limits in admitted:
+        get_executor().submit(run_start_job, job_id, limits)
+
+
+class JobHeartbeat:
+    # Touches the job while its start runs, however long an image pull or a
+    # readiness wait takes. It dies with the worker process, which is what
+    # ContainerStartJob.expire_stale looks for.
+    def __init__(self, job):
+        self.job = job
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='container-start-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(settings.START_JOB_HEARTBEAT):
+                try:
+                    self.job.touch()
+                except Exception as e:
+                    print(f"Error touching container start job {self.job.pk}: {e}")
+        finally:
+            connection.close()
+
+
+def run_start_job(job_id, limits=None):
+    try:
+        job = ContainerStartJob.objects.select_related(
+            'user_scenario__scenario',
+            'user_scenario__user'
+        ).get(pk=job_id)
+        user_scenario = job.user_scenario
+
+        # Time spent queued counts towards the start the student sees
+        timer = StartTimer()
+        timer.phases['queued'] = (timezone.now() - job.created_at).total_seconds()
+        try:
+            with JobHeartbeat(job):
+                container_id, port = DockerManager(user_scenario.docker_host).start_container(
+                    user_scenario.scenario.docker_name,
+                    user_scenario.container_name,
+                    on_phase=job.set_phase,
+                    limits=limits,
+                    timer=timer
+                )
+        except Exception as e:
+            # An expired job may already have been retried, the row is the retry's now
+            if job.set_phase('failed', error=str(e)):
+                user_scenario.container_id = None
+                user_scenario.port = None
+                user_scenario.save(update_fields=['container_id', 'port'])
+                user_scenario.record_stopped()
+            return
+
+        with transaction.atomic():
+            if not ContainerStartJob.objects.select_for_update().filter(pk=job.pk).exclude(phase='failed').exists():
+                # Expired meanwhile: a retry picks the container up by its name
+                print(f"Container start job {job_id} finished after it was failed")
+                return
+            user_scenario.container_id = container_id
+            user_scenario.port = port
+            user_scenario.save(update_fields=['container_id', 'port'])
+            user_scenario.record_started()
+            job.set_phase('ready')
+    except Exception as e:
+        print(f"Error running container start job {job_id}: {e}")
+    finally:
+        # This start no longer counts as in flight, let the next one in
+        try:
+            dispatch_queued_jobs()
+        except Exception as e:
+            print(f"Error dispatching queued start jobs: {e}")
+        connection.close()
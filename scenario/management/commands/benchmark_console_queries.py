@@ -0,0 +1,164 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from group.models import Group
+from scenario.models import GroupScenario, Scenario, ScenarioScreenshot, UserScenario
+from scenario.stats import has_screenshots, instructor_student_scenarios
+
+
+PREFIX = 'benchmark_'
+
+
+def join_queries(instructor):
+    # The console queries as they were: joins through both many-to-many
+    # relations, with DISTINCT to fold the duplicated rows back together
+    groups = Group.objects.filter(staff=instructor)
+    student_scenarios = UserScenario.objects.filter(
+        scenario__groups__group__in=groups,
+        user__joined_group__in=groups
+    )
+    return {
+        'active': student_scenarios.filter(
+            completed_at__isnull=True, container_id__isnull=False
+        ).distinct().order_by('-id'),
+        'pending': student_scenarios.filter(
+            approval_status='pending', completed_at__isnull=False, screenshots__isnull=False
+        ).distinct().order_by('-completed_at'),
+        'completed': student_scenarios.filter(
+            completed_at__isnull=False, screenshots__isnull=False
+        ).distinct().order_by('-completed_at'),
+    }
+
+
+def exists_queries(instructor):
+    student_scenarios = instructor_student_scenarios(instructor.id)
+    return {
+        'active': student_scenarios.filter(
+            completed_at__isnull=True, container_id__isnull=False
+        ).order_by('-id'),
+        'pending': student_scenarios.filter(
+            has_screenshots(), approval_status='pending', completed_at__isnull=False
+        ).order_by('-completed_at'),
+        'completed': student_scenarios.filter(
+            has_screenshots(), completed_at__isnull=False
+        ).order_by('-completed_at'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare EXPLAIN output and timings of the console queries, JOIN + DISTINCT against EXISTS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--scenarios', type=int, default=30)
+        parser.add_argument('--overlap', type=int, default=3,
+                            help='Groups each student and each scenario belongs to')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query, the median is reported')
+        parser.add_argument('--explain', action='store_true', help='Print the query plans')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated data')
+
+    def handle(self, *args, **options):
+        self.clean_up()
+        try:
+            instructor = self.create_data(options)
+            self.stdout.write(
+                f"{options['students']} students, {options['scenarios']} scenarios, {options['groups']} groups, "
+                f"{UserScenario.objects.filter(user__username__startswith=PREFIX).count()} user scenarios, "
+                f"database {connection.vendor}"
+            )
+            self.compare(join_queries(instructor), exists_queries(instructor), options)
+            self.lookup(options)
+        finally:
+            if not options['keep']:
+                self.clean_up()
+
+    def create_data(self, options):
+        rng = random.Random(0)
+        overlap = min(options['overlap'], options['groups'])
+        instructor = User.objects.create_user(f'{PREFIX}instructor', is_staff=True)
+        groups = [
+            Group.objects.create(name=f'{PREFIX}group_{i}', description='Benchmark group', staff=instructor)
+            for i in range(options['groups'])
+        ]
+        scenarios = Scenario.objects.bulk_create([
+            Scenario(name=f'{PREFIX}scenario_{i}', description='Benchmark scenario', docker_name='benchmark:latest')
+            for i in range(options['scenarios'])
+        ])
+        students = User.objects.bulk_create([
+            User(username=f'{PREFIX}student_{i}') for i in range(options['students'])
+        ])
+
+        GroupScenario.objects.bulk_create([
+            GroupScenario(group=group, scenario=scenario)
+            for scenario in scenarios for group in rng.sample(groups, overlap)
+        ])
+        Group.students.through.objects.bulk_create([
+            Group.students.through(group=group, user=student)
+            for student in students for group in rng.sample(groups, overlap)
+        ])
+
+        now = timezone.now()
+        user_scenarios = []
+        for student in students:
+            for scenario in rng.sample(scenarios, min(5, len(scenarios))):
+                completed = rng.random() < 0.6
+                user_scenarios.append(UserScenario(
+                    user=student,
+                    scenario=scenario,
+                    # Never a real container, nothing to tear down on clean up
+                    container_id=None if completed else f'{PREFIX}{student.id}_{scenario.id}',
+                    completed_at=now if completed else None,
+                    approval_status=rng.choice(['pending', 'approved', 'rejected']),
+                ))
+        user_scenarios = UserScenario.objects.bulk_create(user_scenarios)
+        ScenarioScreenshot.objects.bulk_create([
+            ScenarioScreenshot(user_scenario=user_scenario, image='benchmark.png')
+            for user_scenario in user_scenarios if user_scenario.completed_at
+            for _ in range(rng.randint(1, 3))
+        ])
+        return instructor
+
+    def clean_up(self):
+        UserScenario.objects.filter(user__username__startswith=PREFIX).update(container_id=None)
+        Scenario.objects.filter(name__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+    def time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ids = list(queryset.values_list('id', flat=True))
+            timings.append(time.perf_counter() - start)
+        return ids, statistics.median(timings) * 1000
+
+    def compare(self, before, after, options):
+        self.stdout.write(f"{'query':<12} {'rows':>6} {'join ms':>9} {'exists ms':>10} {'speedup':>8}")
+        for name in before:
+            old_ids, old_ms = self.time(before[name], options['repeat'])
+            new_ids, new_ms = self.time(after[name], options['repeat'])
+            if sorted(old_ids) != sorted(new_ids):
+                self.stdout.write(self.style.ERROR(f'{name}: JOIN and EXISTS return different rows'))
+            self.stdout.write(
+                f'{name:<12} {len(new_ids):>6} {old_ms:>9.2f} {new_ms:>10.2f} {old_ms / max(new_ms, 1e-6):>7.1f}x'
+            )
+            if options['explain']:
+                self.stdout.write(f'\n-- {name}, JOIN + DISTINCT\n{before[name].explain()}')
+                self.stdout.write(f'\n-- {name}, EXISTS\n{after[name].explain()}\n')
+
+    def lookup(self, options):
+        # The per-view lookup is served by the (user, scenario) unique index
+        user_scenario = UserScenario.objects.filter(user__username__startswith=PREFIX).first()
+        queryset = UserScenario.objects.filter(
+            scenario_id=user_scenario.scenario_id, user_id=user_scenario.user_id
+        ).order_by('-id')
+        ids, ms = self.time(queryset[:1], options['repeat'])
+        self.stdout.write(f"{'lookup':<12} {len(ids):>6} {'':>9} {ms:>10.2f}")
+        if options['explain']:
+            self.stdout.write(f'\n-- user scenario lookup\n{queryset[:1].explain()}')
@@ -0,0 +1,36 @@
+import time
+
+import docker
+from django.core.management.base import BaseCommand
+
+from scenario.utils import get_docker_client
+
+
+class Command(BaseCommand):
+    help = 'Compare a fresh docker.from_env() per call against the shared pooled client'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            client = docker.from_env()
+            client.containers.list()
+            client.close()
+        per_call = time.perf_counter() - start
+
+        client = get_docker_client()
+        client.containers.list()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            get_docker_client().containers.list()
+        pooled = time.perf_counter() - start
+
+        self.stdout.write(f'Iterations: {iterations}')
+        self.stdout.write(f'docker.from_env() per call: {per_call * 1000 / iterations:.2f} ms/op')
+        self.stdout.write(f'Shared pooled client:       {pooled * 1000 / iterations:.2f} ms/op')
+        if pooled:
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {per_call / pooled:.1f}x'))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scenario.models import Scenario
+from scenario.utils import warm_pool
+
+
+class Command(BaseCommand):
+    help = 'Boot idle containers until every scenario image has its configured warm pool size'
+
+    def handle(self, *args, **options):
+        images = set(Scenario.objects.values_list('docker_name', flat=True)) | set(settings.WARM_POOL_SIZES)
+        for image_name in sorted(images):
+            if warm_pool.target_size(image_name) <= 0:
+                continue
+            for host in settings.DOCKER_HOSTS:
+                try:
+                    started = warm_pool.refill(image_name, host)
+                    self.stdout.write(self.style.SUCCESS(f'{host} {image_name}: started {started} container(s)'))
+                except Exception as e:
+                    self.stderr.write(f'{host} {image_name}: {e}')
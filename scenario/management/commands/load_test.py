@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from group.models import Group
+from quiz.models import Question, Quiz
+from scenario.models import GroupScenario, Level, Scenario, UserScenario
+from tutorial.models import Tutorial
+
+
+PREFIX = 'loadtest_'
+PASSWORD = 'LoadTest-Passw0rd!'
+# 1x1 transparent PNG
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000005000157a9c1f30000000049454e44ae426082'
+)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(fraction * (len(values) - 1)))))
+    return values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def request(self, client, endpoint, method, path, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples[endpoint].append((elapsed, len(queries), response.status_code))
+        return response
+
+
+class Command(BaseCommand):
+    help = 'Simulate a class of students going through a scenario and report latency and DB queries per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Students active at the same time (default: all of them)')
+        parser.add_argument('--polls', type=int, default=20, help='Status polls per student')
+        parser.add_argument('--poll-interval', type=float, default=0.0, help='Seconds between status polls')
+        parser.add_argument('--start-timeout', type=float, default=120.0,
+                            help='Seconds a student waits for the start job before giving up')
+        parser.add_argument('--backend', choices=['fake', 'docker'], default='fake',
+                            help='Container backend to run against (default: the in-memory fake)')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated users and scenario')
+
+    def handle(self, *args, **options):
+        settings.CONTAINER_BACKEND = options['backend']
+
+        setup_test_environment()
+        try:
+            self.clean_up()
+            scenario, students = self.create_class(options['students'])
+            recorder = Recorder()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency'] or len(students)) as executor:
+                outcomes = list(executor.map(
+                    lambda student: self.run_student(student, scenario, recorder, options),
+                    students
+                ))
+            elapsed = time.perf_counter() - started
+            self.report(recorder, elapsed, outcomes)
+        finally:
+            if not options['keep']:
+                self.clean_up()
+            teardown_test_environment()
+
+    def create_class(self, count):
+        instructor = User.objects.create_user(f'{PREFIX}instructor', password=PASSWORD, is_staff=True)
+        group = Group.objects.create(name=f'{PREFIX}class', description='Load test class', staff=instructor)
+        scenario = Scenario.objects.create(
+            name=f'{PREFIX}scenario',
+            description='Load test scenario',
+            docker_name='cyberrange/loadtest:latest'
+        )
+        GroupScenario.objects.create(group=group, scenario=scenario)
+        Level.objects.create(scenario=scenario, difficulty='beginner', tools='none', recommended_time=60)
+        Tutorial.objects.create(scenario=scenario, title='Load test tutorial')
+        quiz = Quiz.objects.create(scenario=scenario, title='Load test quiz')
+        Question.objects.create(
+            quiz=quiz, question_text='?', option_a='a', option_b='b', option_c='c', option_d='d', correct_option='A'
+        )
+
+        # One hash for everyone, hashing per user would dominate setup time
+        template = User()
+        template.set_password(PASSWORD)
+        students = User.objects.bulk_create([
+            User(username=f'{PREFIX}student_{i}', password=template.password) for i in range(count)
+        ])
+        group.students.add(*students)
+        return scenario, students
+
+    def clean_up(self):
+        for user_scenario in UserScenario.objects.filter(user__username__startswith=PREFIX):
+            for screenshot in user_scenario.screenshots.all():
+                screenshot.image.delete(save=False)
+            user_scenario.delete()
+        Scenario.objects.filter(name__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+
+    def run_student(self, student, scenario, recorder, options):
+        client = Client()
+        try:
+            recorder.request(client, 'login', 'post', reverse('account:login'),
+                             data={'username': student.username, 'password': PASSWORD})
+            recorder.request(client, 'scenario_detail', 'get', reverse('scenario:scenario_detail', args=[scenario.id]))
+
+            response = recorder.request(client, 'start_scenario', 'post',
+                                        reverse('scenario:start_scenario', args=[scenario.id]),
+                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            if response.status_code != 202:
+                # Redirects carry the reason as a flash message
+                reasons = [str(message) for message in get_messages(response.wsgi_request)]
+                return f"start rejected: {'; '.join(reasons) or response.status_code}"
+            job = response.json()
+            job_url = job['job_url']
+            deadline = time.monotonic() + options['start_timeout']
+            while job.get('phase') not in ('ready', 'failed'):
+                if time.monotonic() > deadline:
+                    return 'start timed out'
+                time.sleep(0.2)
+                job = recorder.request(client, 'start_job_status', 'get', job_url).json()
+            if job['phase'] == 'failed':
+                return 'start failed'
+
+            etag = None
+            status_url = reverse('scenario:container_status', args=[scenario.id])
+            for _ in range(options['polls']):
+                headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+                response = recorder.request(client, 'container_status', 'get', status_url, **headers)
+                etag = response.get('ETag', etag)
+                if options['poll_interval']:
+                    time.sleep(options['poll_interval'])
+
+            recorder.request(client, 'submit_screenshots', 'post',
+                             reverse('scenario:submit_screenshots', args=[scenario.id]),
+                             data={'screenshots[]': SimpleUploadedFile('proof.png', PNG, content_type='image/png')})
+            recorder.request(client, 'take_quiz', 'get', reverse('quiz:TakeQuiz', args=[scenario.id]))
+            recorder.request(client, 'submit_quiz', 'post', reverse('quiz:SubmitQuiz', args=[scenario.id]),
+                             data=json.dumps({'score': 1, 'total_questions': 1}), content_type='application/json')
+            recorder.request(client, 'rate_content', 'post', reverse('rating:RateContent', args=[scenario.id]),
+                             data={'scenario_rating': 5, 'tutorial_rating': 4, 'quiz_rating': 3})
+            return 'completed'
+        except Exception as e:
+            return f'error: {e}'
+        finally:
+            connection.close()
+
+    def report(self, recorder, elapsed, outcomes):
+        total = sum(len(samples) for samples in recorder.samples.values())
+        self.stdout.write(
+            f'{len(outcomes)} students, {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), '
+            f'backend {settings.CONTAINER_BACKEND}'
+        )
+        self.stdout.write(
+            f"{'endpoint':<20} {'count':>6} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'avg q':>6} {'max q':>6}"
+        )
+        for endpoint, samples in recorder.samples.items():
+            latencies = [sample[0] * 1000 for sample in samples]
+            queries = [sample[1] for sample in samples]
+            errors = sum(1 for sample in samples if sample[2] >= 500)
+            self.stdout.write(
+                f'{endpoint:<20} {len(samples):>6} {errors:>6} {len(samples) / elapsed:>7.1f} '
+                f'{percentile(latencies, 0.50):>8.1f} {percentile(latencies, 0.95):>8.1f} '
+                f'{percentile(latencies, 0.99):>8.1f} {sum(queries) / len(queries):>6.1f} {max(queries):>6}'
+            )
+
+        summary = defaultdict(int)
+        for outcome in outcomes:
+            summary[outcome] += 1
+        for outcome, count in sorted(summary.items()):
+            style = self.style.SUCCESS if outcome == 'completed' else self.style.WARNING
+            self.stdout.write(style(f'{outcome}: {count}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scenario.images import prepull_images
+from scenario.models import Scenario
+
+
+class Command(BaseCommand):
+    help = 'Pull every scenario image ahead of time so the first start does not pay for the download'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Maximum concurrent pulls')
+
+    def handle(self, *args, **options):
+        images = Scenario.objects.values_list('docker_name', flat=True).distinct()
+        for result in prepull_images(images, max_workers=options['workers']):
+            if result['error']:
+                self.stderr.write(f"{result['host']} {result['image']}: failed after {result['duration']}s: {result['error']}")
+                continue
+            size = (result['size'] or 0) / (1024 * 1024)
+            state = 'already current' if result['skipped'] else 'pulled'
+            self.stdout.write(self.style.SUCCESS(
+                f"{result['host']} {result['image']}: {state} in {result['duration']}s, {size:.0f} MiB, {result['digest']}"
+            ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scenario.reaper import reap
+
+
+class Command(BaseCommand):
+    help = 'Pause and then stop scenario containers that have run past their level time limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be reaped')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running and reap every N seconds instead of once')
+
+    def handle(self, *args, **options):
+        while True:
+            report = reap(dry_run=options['dry_run'])
+            self.stdout.write(
+                f"Paused {report['paused']}, stopped {report['stopped']}, "
+                f"freed {report['freed_cpu_percent']:.1f}% CPU and "
+                f"{report['freed_memory_bytes'] / (1024 * 1024):.1f} MiB memory"
+                + (' (dry run)' if report['dry_run'] else '')
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
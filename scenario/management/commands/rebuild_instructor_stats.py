@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from scenario.models import InstructorStats
+from scenario.stats import refresh_instructor_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the instructor dashboard statistics from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--instructor', action='append', default=[],
+                            help='Username to rebuild (repeatable, default: every staff member)')
+
+    def handle(self, *args, **options):
+        instructors = User.objects.filter(is_staff=True)
+        if options['instructor']:
+            instructors = User.objects.filter(username__in=options['instructor'])
+        else:
+            # Rows of users that are no longer staff
+            InstructorStats.objects.exclude(instructor__is_staff=True).delete()
+
+        instructor_ids = list(instructors.values_list('pk', flat=True))
+        refresh_instructor_stats(instructor_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {len(instructor_ids)} instructors'))
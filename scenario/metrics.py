@@ -0,0 +1,140 @@
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+
+
+# Upper bounds in seconds, Prometheus style. Counters live in the Django cache
+# so every worker process feeds the same histograms, given a shared CACHES
+# backend (see scenario.W001).
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float('inf'))
+START_PHASES = (
+    'queued',      # waiting for admission and a worker thread
+    'lookup',      # finding an existing container
+    'start',       # starting an existing, stopped container
+    'warm_pool',   # trying to claim a pre-booted container
+    'port',        # reserving a host port
+    'pull',        # downloading the image
+    'run',         # containers.run
+    'ready_wait',  # readiness probe until the desktop answers
+    'retry',       # cleanup and back-off between attempts
+    'total',
+)
+START_OUTCOMES = ('new', 'existing', 'warm', 'failed')
+ATTEMPT_BUCKETS = (1, 2, 3, float('inf'))
+
+
+def _bucket_label(bound):
+    return '+Inf' if bound == float('inf') else f'{bound:g}'
+
+
+def _incr(key, amount=1):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.set(key, amount, timeout=None)
+
+
+def observe(name, label, value, buckets=BUCKETS):
+    bound = next(bound for bound in buckets if value <= bound)
+    _incr(f'metrics:{name}:{label}:bucket:{_bucket_label(bound)}')
+    _incr(f'metrics:{name}:{label}:count')
+    # The cache only increments integers, so the sum is kept in microseconds
+    _incr(f'metrics:{name}:{label}:sum_us', int(value * 1_000_000))
+
+
+def increment(name, label):
+    _incr(f'metrics:{name}:{label}:total')
+
+
+def histogram(name, label, buckets=BUCKETS):
+    keys = [f'metrics:{name}:{label}:bucket:{_bucket_label(bound)}' for bound in buckets]
+    values = cache.get_many(keys + [f'metrics:{name}:{label}:count', f'metrics:{name}:{label}:sum_us'])
+    counts = [values.get(key, 0) for key in keys]
+    count = values.get(f'metrics:{name}:{label}:count', 0)
+
+    cumulative = []
+    running = 0
+    for bound, bucket_count in zip(buckets, counts):
+        running += bucket_count
+        cumulative.append((_bucket_label(bound), running))
+
+    def quantile(fraction):
+        # Upper bound of the bucket holding the quantile
+        target = fraction * count
+        for bound, (_, seen) in zip(buckets, cumulative):
+            if count and seen >= target:
+                return bound
+        return None
+
+    return {
+        'buckets': cumulative,
+        'count': count,
+        'sum': values.get(f'metrics:{name}:{label}:sum_us', 0) / 1_000_000,
+        'p50': quantile(0.50),
+        'p95': quantile(0.95),
+        'p99': quantile(0.99),
+    }
+
+
+def start_metrics():
+    return {
+        'phases': {phase: histogram('container_start_phase_seconds', phase) for phase in START_PHASES},
+        'attempts': histogram('container_start_attempts', 'all', buckets=ATTEMPT_BUCKETS),
+        'outcomes': {
+            outcome: cache.get(f'metrics:container_starts:{outcome}:total', 0) for outcome in START_OUTCOMES
+        },
+    }
+
+
+def render_prometheus():
+    lines = []
+
+    def add_histogram(name, label_name, label, data):
+        for bound, seen in data['buckets']:
+            lines.append(f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} {seen}')
+        lines.append(f'{name}_sum{{{label_name}="{label}"}} {data["sum"]}')
+        lines.append(f'{name}_count{{{label_name}="{label}"}} {data["count"]}')
+
+    metrics = start_metrics()
+    lines.append('# HELP cyberrange_container_start_phase_seconds Time spent in each container start phase')
+    lines.append('# TYPE cyberrange_container_start_phase_seconds histogram')
+    for phase, data in metrics['phases'].items():
+        add_histogram('cyberrange_container_start_phase_seconds', 'phase', phase, data)
+
+    lines.append('# HELP cyberrange_container_start_attempts Attempts needed per container start')
+    lines.append('# TYPE cyberrange_container_start_attempts histogram')
+    add_histogram('cyberrange_container_start_attempts', 'scope', 'all', metrics['attempts'])
+
+    lines.append('# HELP cyberrange_container_starts_total Container starts by outcome')
+    lines.append('# TYPE cyberrange_container_starts_total counter')
+    for outcome, total in metrics['outcomes'].items():
+        lines.append(f'cyberrange_container_starts_total{{outcome="{outcome}"}} {total}')
+    return '\n'.join(lines) + '\n'
+
+
+class StartTimer:
+    # Lap timer for DockerManager.start_container: each lap() books the time
+    # since the previous one against a phase, finish() records the histograms.
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.phases = defaultdict(float)
+        self.attempts = 0
+        self.outcome = 'new'
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] += now - self.last
+        self.last = now
+
+    def finish(self, outcome):
+        try:
+            for phase, seconds in self.phases.items():
+                observe('container_start_phase_seconds', phase, seconds)
+            observe('container_start_phase_seconds', 'total', time.perf_counter() - self.started)
+            observe('container_start_attempts', 'all', self.attempts, buckets=ATTEMPT_BUCKETS)
+            increment('container_starts', outcome)
+        except Exception as e:
+            # Metrics must never fail a start
+            print(f"Error recording container start metrics: {e}")
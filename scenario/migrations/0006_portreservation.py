@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario', '0005_alter_level_unique_together_alter_level_scenario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('port', models.IntegerField(unique=True)),
+                ('container_name', models.CharField(max_length=255, unique=True)),
+                ('reserved_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
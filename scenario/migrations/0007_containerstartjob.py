@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:44
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario', '0006_portreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContainerStartJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('phase', models.CharField(choices=[('queued', 'Queued'), ('creating', 'Creating'), ('starting', 'Starting'), ('ready', 'Ready'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user_scenario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='start_jobs', to='scenario.userscenario')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def assign_default_host(apps, schema_editor):
+    # Reservations made before multi-host support all belong to the single daemon
+    PortReservation = apps.get_model('scenario', 'PortReservation')
+    PortReservation.objects.filter(docker_host='').update(docker_host=settings.DEFAULT_DOCKER_HOST)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario', '0007_containerstartjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portreservation',
+            name='docker_host',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.RunPython(assign_default_host, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='userscenario',
+            name='docker_host',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='portreservation',
+            name='port',
+            field=models.IntegerField(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='portreservation',
+            unique_together={('docker_host', 'port')},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario', '0008_docker_host'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContainerResourceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('docker_host', models.CharField(blank=True, default='', max_length=100)),
+                ('container_id', models.CharField(max_length=100)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('samples', models.IntegerField()),
+                ('cpu_percent_avg', models.FloatField()),
+                ('cpu_percent_max', models.FloatField()),
+                ('memory_bytes_max', models.BigIntegerField()),
+                ('series', models.JSONField(default=dict)),
+                ('user_scenario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resource_rollups', to='scenario.userscenario')),
+            ],
+            options={
+                'ordering': ['-ended_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario', '0009_containerresourcerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userscenario',
+            name='accumulated_runtime',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userscenario',
+            name='last_known_state',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='userscenario',
+            name='paused_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userscenario',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
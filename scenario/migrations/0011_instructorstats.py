@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('scenario', '0010_userscenario_runtime_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstructorStats',
+            fields=[
+                ('instructor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_students', models.IntegerField(default=0)),
+                ('total_scenarios', models.IntegerField(default=0)),
+                ('total_groups', models.IntegerField(default=0)),
+                ('pending_approvals', models.IntegerField(default=0)),
+                ('completed_scenarios', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
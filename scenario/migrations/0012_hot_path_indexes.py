@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group', '0001_initial'),
+        ('scenario', '0011_instructorstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groupscenario',
+            index=models.Index(fields=['scenario', 'group'], name='groupscenario_scenario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userscenario',
+            index=models.Index(fields=['approval_status', '-completed_at'], name='userscenario_approval_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userscenario',
+            index=models.Index(fields=['container_id', 'completed_at'], name='userscenario_active_idx'),
+        ),
+    ]
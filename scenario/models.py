@@ -1,9 +1,14 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils import timezone
 from tinymce.models import HTMLField
 
-from .utils import DockerManager
+from .readiness import desktop_url
+from .utils import parse_docker_time, resolve_host
 from django.core.validators import MinValueValidator
 
 
@@ -22,6 +27,14 @@ class UserScenario(models.Model):
     scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE)
     container_id = models.CharField(max_length=100, null=True, blank=True)
     port = models.IntegerField(null=True, blank=True)
+    docker_host = models.CharField(max_length=100, blank=True, default='')
+    # Kept current by the container lifecycle code so runtime and time limits
+    # can be worked out without asking the daemon. started_at is the start of
+    # the current running stretch, accumulated_runtime the seconds run before it.
+    started_at = models.DateTimeField(null=True, blank=True)
+    paused_at = models.DateTimeField(null=True, blank=True)
+    accumulated_runtime = models.IntegerField(default=0)
+    last_known_state = models.CharField(max_length=20, blank=True, default='')
     completed_at = models.DateTimeField(null=True, blank=True)
     approval_status = models.CharField(
         max_length=20,
@@ -42,46 +55,174 @@ class UserScenario(models.Model):
     )
 
     class Meta:
+        # unique_together already indexes the (user, scenario) lookups
         unique_together = ('user', 'scenario')
+        indexes = [
+            # Console pending approvals and completed tables
+            models.Index(fields=['approval_status', '-completed_at'], name='userscenario_approval_idx'),
+            # Active containers, used by the console, the sampler and the reaper
+            models.Index(fields=['container_id', 'completed_at'], name='userscenario_active_idx'),
+        ]
 
     @property
-    def is_time_exceeded(self):
-        if not self.container_id:
-            return False
+    def container_name(self):
+        return f"{self.user.username}_{self.scenario.name}".replace(' ', '_').lower()
+
+    @property
+    def desktop_url(self):
+        if not self.port:
+            return None
+        return desktop_url(resolve_host(self.docker_host), self.port)
 
+    @property
+    def time_limit(self):
+        # select_related('scenario__level') makes this free
         try:
-            docker_manager = DockerManager()
-            container_info = docker_manager.get_container_status(self.container_id)
-            start_time = container_info.get('StartedAt')
-            if not start_time:
-                return False
-
-            start_time = timezone.datetime.strptime(
-                start_time.split('.')[0],
-                '%Y-%m-%dT%H:%M:%S'
-            ).replace(tzinfo=timezone.utc)
-
-            elapsed = timezone.now() - start_time
-            return elapsed.total_seconds() / 60 > self.scenario.time_limit
-        except Exception:
-            return False
+            level = self.scenario.level
+        except Level.DoesNotExist:
+            return None
+        return level.recommended_time or None
 
-    def clean_up(self):
-        if self.container_id:
-            try:
-                docker_manager = DockerManager()
-                docker_manager.stop_container(self.container_id)
-            except Exception:
-                pass
+    @property
+    def runtime(self):
+        # Seconds the container has been running, pauses excluded
+        runtime = self.accumulated_runtime
+        if self.last_known_state == 'running' and self.started_at:
+            runtime += int((timezone.now() - self.started_at).total_seconds())
+        return max(runtime, 0)
 
-    def delete(self, *args, **kwargs):
-        self.clean_up()
-        super().delete(*args, **kwargs)
+    @property
+    def is_time_exceeded(self):
+        if not self.container_id or not self.time_limit:
+            return False
+        return self.runtime / 60 > self.time_limit
+
+    def _close_running_stretch(self, now):
+        if self.last_known_state == 'running' and self.started_at:
+            self.accumulated_runtime += max(int((now - self.started_at).total_seconds()), 0)
+
+    def record_started(self, started_at=None):
+        # A new run: the runtime starts from zero
+        self.started_at = started_at or timezone.now()
+        self.paused_at = None
+        self.accumulated_runtime = 0
+        self.last_known_state = 'running'
+        self.save(update_fields=['started_at', 'paused_at', 'accumulated_runtime', 'last_known_state'])
+
+    def record_running(self, now=None):
+        # Resumed or restarted: the runtime carries on
+        now = now or timezone.now()
+        self._close_running_stretch(now)
+        self.started_at = now
+        self.paused_at = None
+        self.last_known_state = 'running'
+        self.save(update_fields=['started_at', 'paused_at', 'accumulated_runtime', 'last_known_state'])
+
+    def record_paused(self, now=None):
+        now = now or timezone.now()
+        self._close_running_stretch(now)
+        self.paused_at = now
+        self.last_known_state = 'paused'
+        self.save(update_fields=['paused_at', 'accumulated_runtime', 'last_known_state'])
+
+    def record_stopped(self, now=None):
+        now = now or timezone.now()
+        self._close_running_stretch(now)
+        self.started_at = None
+        self.paused_at = None
+        self.last_known_state = 'stopped'
+        self.save(update_fields=['started_at', 'paused_at', 'accumulated_runtime', 'last_known_state'])
+
+    def sync_state(self, container_status):
+        # Catch up with changes made outside the lifecycle code (crashes, a
+        # restart policy, containers started before these fields existed)
+        if container_status['is_paused']:
+            if self.last_known_state != 'paused':
+                self.record_paused()
+        elif container_status['is_running']:
+            if self.last_known_state != 'running':
+                started_at = container_status.get('started_at')
+                if not self.last_known_state and started_at:
+                    self.record_started(parse_docker_time(started_at))
+                else:
+                    self.record_running()
+        elif self.last_known_state in ('running', 'paused'):
+            self.record_stopped()
 
     def __str__(self):
         return f"{self.user.username} - {self.scenario.name}"
 
 
+class ContainerStartJob(models.Model):
+    PHASE_CHOICES = [
+        ('queued', 'Queued'),
+        ('creating', 'Creating'),
+        ('starting', 'Starting'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_PHASES = ('queued', 'creating', 'starting')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_scenario = models.ForeignKey(UserScenario, on_delete=models.CASCADE, related_name='start_jobs')
+    phase = models.CharField(max_length=20, choices=PHASE_CHOICES, default='queued')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def set_phase(self, phase, error=''):
+        # A failed job is final: a worker finishing late must not revive a job
+        # that was expired and possibly retried. Returns whether it applied.
+        updated = ContainerStartJob.objects.filter(pk=self.pk).exclude(phase='failed').update(
+            phase=phase, error=error, updated_at=timezone.now()
+        )
+        if updated:
+            self.phase = phase
+            self.error = error
+        return bool(updated)
+
+    def touch(self):
+        ContainerStartJob.objects.filter(pk=self.pk, phase__in=['creating', 'starting']).update(
+            updated_at=timezone.now()
+        )
+
+    @classmethod
+    def expire_stale(cls):
+        # Running jobs are touched every START_JOB_HEARTBEAT seconds, so only
+        # jobs whose worker process died mid-start (deploy, crash) go quiet.
+        # Fail them so the student can start again and they stop holding
+        # admission budget.
+        now = timezone.now()
+        expired = cls.objects.filter(
+            phase__in=['creating', 'starting'],
+            updated_at__lt=now - timedelta(seconds=settings.START_JOB_TIMEOUT)
+        ).update(phase='failed', error='Start was interrupted, please try again', updated_at=now)
+        expired += cls.objects.filter(
+            phase='queued',
+            updated_at__lt=now - timedelta(seconds=settings.START_QUEUE_TIMEOUT)
+        ).update(phase='failed', error='Timed out waiting for a free host, please try again', updated_at=now)
+        return expired
+
+    def __str__(self):
+        return f"{self.user_scenario} - {self.phase}"
+
+
+class PortReservation(models.Model):
+    docker_host = models.CharField(max_length=100, blank=True, default='')
+    port = models.IntegerField()
+    container_name = models.CharField(max_length=255, unique=True)
+    reserved_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('docker_host', 'port')
+
+    def __str__(self):
+        return f"{self.container_name} - {self.port}"
+
+
 class GroupScenario(models.Model):
     group = models.ForeignKey('group.Group', related_name='scenarios', on_delete=models.CASCADE)
     scenario = models.ForeignKey(Scenario, related_name='groups', on_delete=models.CASCADE)
@@ -89,11 +230,56 @@ class GroupScenario(models.Model):
 
     class Meta:
         unique_together = ('group', 'scenario')
+        indexes = [
+            # Correlated lookups from UserScenario go by scenario first
+            models.Index(fields=['scenario', 'group'], name='groupscenario_scenario_idx'),
+        ]
 
     def __str__(self):
         return f"{self.group.name} - {self.scenario.name}"
 
 
+class ContainerResourceRollup(models.Model):
+    user_scenario = models.ForeignKey(
+        UserScenario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resource_rollups'
+    )
+    docker_host = models.CharField(max_length=100, blank=True, default='')
+    container_id = models.CharField(max_length=100)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    samples = models.IntegerField()
+    cpu_percent_avg = models.FloatField()
+    cpu_percent_max = models.FloatField()
+    memory_bytes_max = models.BigIntegerField()
+    # Downsampled columns, see sampler.FIELDS
+    series = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['-ended_at']
+
+    def __str__(self):
+        return f"{self.container_id[:12]} - {self.ended_at}"
+
+
+class InstructorStats(models.Model):
+    # Dashboard counters per instructor, kept current by scenario.signals and
+    # rebuilt with `manage.py rebuild_instructor_stats`
+    instructor = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='dashboard_stats')
+    total_students = models.IntegerField(default=0)
+    total_scenarios = models.IntegerField(default=0)
+    total_groups = models.IntegerField(default=0)
+    pending_approvals = models.IntegerField(default=0)
+    completed_scenarios = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.instructor.username} stats"
+
+
 class ScenarioScreenshot(models.Model):
     user_scenario = models.ForeignKey(UserScenario, on_delete=models.CASCADE, related_name='screenshots')
     image = models.ImageField(upload_to='scenario_screenshots/%Y/%m/%d/')
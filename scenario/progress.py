@@ -0,0 +1,141 @@
+import secrets
+import threading
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+
+LOG_TAIL = 100
+PROGRESS_LABEL = 'cyberrange.progress_channel'
+PROGRESS_SALT = 'scenario.progress'
+
+
+def parse_progress_line(line, progress, level):
+    if "Progress:" in line:
+        try:
+            progress = int(line.split("Progress:")[1].strip().replace('%', ''))
+        except (IndexError, ValueError):
+            pass
+    elif "Level:" in line:
+        try:
+            level = line.split("Level:")[1].strip()
+        except IndexError:
+            pass
+    return progress, level
+
+
+def _timestamp_ns(stamp):
+    # Docker prefixes each line with an RFC3339Nano timestamp when timestamps=True
+    try:
+        base, _, fraction = stamp.rstrip('Z').partition('.')
+        seconds = datetime.strptime(base, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=dt_timezone.utc).timestamp()
+        return int(seconds) * 1_000_000_000 + int((fraction or '0').ljust(9, '0')[:9])
+    except ValueError:
+        return None
+
+
+class LogFollower:
+    # Remembers, per container, the timestamp of the last log line it has seen
+    # plus the latest progress/level, so each poll only downloads new lines.
+    # That timestamp doubles as the cursor clients pass back to get a delta.
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def _record(self, container_id):
+        with self._lock:
+            record = self._records.get(container_id)
+            if record is None:
+                record = {
+                    'since_ns': 0,
+                    'progress': 0,
+                    'level': None,
+                    'lines': deque(maxlen=LOG_TAIL),
+                    'lock': threading.Lock(),
+                }
+                self._records[container_id] = record
+            return record
+
+    def read(self, api, container_id, since=None):
+        record = self._record(container_id)
+        with record['lock']:
+            if record['since_ns']:
+                raw = api.logs(container_id, timestamps=True, since=record['since_ns'] / 1e9)
+            else:
+                raw = api.logs(container_id, timestamps=True, tail=LOG_TAIL)
+
+            for line in raw.decode('utf-8', errors='replace').splitlines():
+                stamp, _, message = line.partition(' ')
+                stamp_ns = _timestamp_ns(stamp)
+                if stamp_ns is None:
+                    message = line
+                elif stamp_ns <= record['since_ns']:
+                    # `since` has one-second granularity on some daemons
+                    continue
+                else:
+                    record['since_ns'] = stamp_ns
+                record['lines'].append((record['since_ns'], message))
+                record['progress'], record['level'] = parse_progress_line(
+                    message, record['progress'], record['level']
+                )
+
+            return {
+                'progress': record['progress'],
+                'level': record['level'],
+                'logs': '\n'.join(
+                    message for stamp_ns, message in record['lines']
+                    if since is None or stamp_ns > since
+                ),
+                'cursor': record['since_ns'],
+            }
+
+    def last(self, container_id):
+        # Progress and level from the lines read so far, without a logs call
+        with self._lock:
+            record = self._records.get(container_id)
+            return (record['progress'], record['level']) if record else (0, None)
+
+    def forget(self, container_id):
+        with self._lock:
+            self._records.pop(container_id, None)
+
+
+def new_progress_channel():
+    # Returns the channel id (stored as a container label) and the token handed
+    # to the container, which only proves it may report on that one channel
+    channel = secrets.token_hex(16)
+    return channel, signing.Signer(salt=PROGRESS_SALT).sign(channel)
+
+
+def channel_from_token(token):
+    try:
+        return signing.Signer(salt=PROGRESS_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+
+
+def record_progress(channel, progress=None, level=None):
+    key = f'progress:{channel}'
+    record = cache.get(key) or {'progress': 0, 'level': None}
+    if progress is not None:
+        record['progress'] = progress
+    if level is not None:
+        record['level'] = level
+    record['updated_at'] = timezone.now().isoformat()
+    cache.set(key, record, timeout=settings.PROGRESS_CACHE_TIMEOUT)
+    return record
+
+
+def reported_progress(channel):
+    if not channel:
+        return None
+    return cache.get(f'progress:{channel}')
+
+
+def forget_progress(channel):
+    if channel:
+        cache.delete(f'progress:{channel}')
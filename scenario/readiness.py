@@ -0,0 +1,127 @@
+import http.client
+import socket
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+
+DESKTOP_PORT = '3000/tcp'
+
+
+class ContainerNotReady(Exception):
+    pass
+
+
+def probe_address(host):
+    config = settings.DOCKER_HOSTS.get(host, {})
+    if config.get('probe_address'):
+        return config['probe_address']
+    # Remote daemons publish ports on their own address
+    base_url = config.get('base_url') or ''
+    if base_url.startswith(('tcp://', 'http://', 'https://', 'ssh://')):
+        return urlparse(base_url).hostname
+    return '127.0.0.1'
+
+
+def public_address(host):
+    # Where students' browsers reach the host's published ports
+    config = settings.DOCKER_HOSTS.get(host, {})
+    return config.get('public_address') or probe_address(host)
+
+
+def desktop_url(host, port):
+    return f'http://{public_address(host)}:{port}'
+
+
+def published_port(container):
+    bindings = (container.ports or {}).get(DESKTOP_PORT)
+    return bindings[0]['HostPort'] if bindings else None
+
+
+def bound_port(container):
+    # The port a container was created with, known while it is stopped too
+    bindings = (container.attrs.get('HostConfig', {}).get('PortBindings') or {}).get(DESKTOP_PORT)
+    return bindings[0]['HostPort'] if bindings else None
+
+
+class ReadinessProbe:
+    # Decides when a started container can be handed to a student: the daemon
+    # reports it running (waiting on the events API instead of a sleep loop)
+    # and the desktop answers on the published port. Probes back off
+    # exponentially until READINESS_TIMEOUT.
+    def __init__(self, manager, timeout=None):
+        self.manager = manager
+        self.timeout = timeout or settings.READINESS_TIMEOUT
+        self.deadline = time.monotonic() + self.timeout
+        # Nothing listens on the fake backend's ports
+        self.mode = 'none' if settings.CONTAINER_BACKEND == 'fake' else settings.READINESS_PROBE
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def wait(self, container):
+        container = self.wait_running(container)
+        port = published_port(container)
+        if port is None:
+            raise ContainerNotReady("Container started but port mapping failed")
+        self.wait_answering(container, port)
+        return port
+
+    def wait_running(self, container):
+        waiting_since = time.time()
+        container.reload()
+        if container.status == 'running':
+            return container
+        if container.status in ('exited', 'dead'):
+            raise ContainerNotReady(f"Container {container.status} before it became ready")
+
+        # Events are replayed from `since`, so a start that happens between the
+        # reload above and the subscription is not missed
+        events = self.manager.client.events(
+            decode=True,
+            since=int(waiting_since) - 1,
+            until=int(time.time() + self.remaining()) + 1,
+            filters={'type': 'container', 'container': container.id, 'event': ['start', 'die', 'destroy']},
+        )
+        try:
+            for event in events:
+                action = event.get('Action') or event.get('status')
+                if action != 'start':
+                    raise ContainerNotReady(f"Container received {action} before it became ready")
+                container.reload()
+                if container.status == 'running':
+                    return container
+        finally:
+            events.close()
+        raise ContainerNotReady(f"Container was not running within {self.timeout}s")
+
+    def wait_answering(self, container, port):
+        address = probe_address(self.manager.host)
+        delay = settings.READINESS_PROBE_INITIAL_DELAY
+        while not self.probe(address, port):
+            if self.remaining() <= 0:
+                raise ContainerNotReady(f"Desktop on port {port} did not answer within {self.timeout}s")
+            # The events-fed state table notices a crash without another API call
+            state = self.manager.states.get(container.id)
+            if state and not state['is_running']:
+                raise ContainerNotReady("Container stopped while waiting for the desktop")
+            time.sleep(max(0, min(delay, self.remaining())))
+            delay = min(delay * 2, settings.READINESS_PROBE_MAX_DELAY)
+
+    def probe(self, address, port):
+        if self.mode == 'none':
+            return True
+        timeout = max(0.1, min(settings.READINESS_PROBE_CONNECT_TIMEOUT, self.remaining()))
+        try:
+            if self.mode == 'http':
+                connection = http.client.HTTPConnection(address, int(port), timeout=timeout)
+                try:
+                    connection.request('GET', settings.READINESS_PROBE_PATH)
+                    return connection.getresponse().status < 500
+                finally:
+                    connection.close()
+            with socket.create_connection((address, int(port)), timeout=timeout):
+                return True
+        except (OSError, http.client.HTTPException):
+            return False
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Level, UserScenario
+from .utils import DockerManager
+
+
+def find_overdue(now=None):
+    # Worked out from the runtime kept on each row, without asking the daemon.
+    # A container running past its limit plus the grace period is paused, and
+    # one that has then stayed paused for another grace period is stopped.
+    now = now or timezone.now()
+    grace = timedelta(minutes=settings.REAPER_GRACE_MINUTES)
+    limits = dict(Level.objects.filter(recommended_time__gt=0).values_list('scenario_id', 'recommended_time'))
+
+    to_pause, to_stop = [], []
+    active = UserScenario.objects.filter(
+        container_id__isnull=False,
+        scenario_id__in=limits.keys(),
+        last_known_state__in=['running', 'paused']
+    ).select_related('user', 'scenario')
+    for user_scenario in active:
+        limit = timedelta(minutes=limits[user_scenario.scenario_id])
+        runtime = timedelta(seconds=user_scenario.runtime)
+        if user_scenario.last_known_state == 'paused':
+            if runtime > limit and user_scenario.paused_at and now > user_scenario.paused_at + grace:
+                to_stop.append(user_scenario)
+        elif runtime > limit + grace:
+            to_pause.append(user_scenario)
+    return to_pause, to_stop
+
+
+def _pause(user_scenario):
+    try:
+        DockerManager(user_scenario.docker_host).pause_container(user_scenario.container_id)
+        return True
+    except Exception as e:
+        print(f"Error pausing overdue container {user_scenario.container_id}: {e}")
+        return False
+
+
+def _stop(user_scenario):
+    docker_manager = DockerManager(user_scenario.docker_host)
+    usage = {'cpu_percent': 0.0, 'memory_bytes': 0}
+    try:
+        usage = docker_manager.get_container_usage(user_scenario.container_id)
+    except Exception:
+        pass
+
+    try:
+        if settings.REAPER_REMOVE_CONTAINERS:
+            docker_manager.remove_container(user_scenario.container_id, force=True)
+        else:
+            docker_manager.stop_container(user_scenario.container_id)
+    except Exception as e:
+        print(f"Error stopping overdue container {user_scenario.container_id}: {e}")
+        return None
+    finally:
+        connection.close()
+    return usage
+
+
+def reap(dry_run=False):
+    to_pause, to_stop = find_overdue()
+    report = {
+        'paused': 0,
+        'stopped': 0,
+        'freed_cpu_percent': 0.0,
+        'freed_memory_bytes': 0,
+        'dry_run': dry_run,
+    }
+    if dry_run:
+        report['paused'] = len(to_pause)
+        report['stopped'] = len(to_stop)
+        return report
+
+    with ThreadPoolExecutor(max_workers=settings.DOCKER_BATCH_WORKERS) as executor:
+        paused = list(executor.map(_pause, to_pause))
+        freed = list(executor.map(_stop, to_stop))
+
+    report['paused'] = sum(paused)
+    for user_scenario, ok in zip(to_pause, paused):
+        if ok:
+            user_scenario.record_paused()
+    stopped = [user_scenario for user_scenario, usage in zip(to_stop, freed) if usage is not None]
+    for usage in freed:
+        if usage is not None:
+            report['freed_cpu_percent'] += usage['cpu_percent']
+            report['freed_memory_bytes'] += usage['memory_bytes']
+    report['stopped'] = len(stopped)
+
+    UserScenario.objects.filter(id__in=[user_scenario.id for user_scenario in stopped]).update(
+        container_id=None,
+        port=None
+    )
+    for user_scenario in stopped:
+        user_scenario.record_stopped()
+    return report
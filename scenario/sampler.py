@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+
+FIELDS = (
+    'timestamp',
+    'cpu_percent',
+    'memory_bytes',
+    'network_rx_rate',  # bytes per second
+    'network_tx_rate',
+    'block_read_rate',
+    'block_write_rate',
+)
+INDEX_KEY = 'resources:index'
+TICK_KEY = 'resources:tick'
+
+
+def series_key(host, container_id):
+    return f'resources:series:{host}:{container_id}'
+
+
+def io_counters(stats):
+    networks = stats.get('networks') or {}
+    block = (stats.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+    return {
+        'network_rx': sum(network.get('rx_bytes', 0) for network in networks.values()),
+        'network_tx': sum(network.get('tx_bytes', 0) for network in networks.values()),
+        'block_read': sum(entry.get('value', 0) for entry in block if entry.get('op', '').lower() == 'read'),
+        'block_write': sum(entry.get('value', 0) for entry in block if entry.get('op', '').lower() == 'write'),
+    }
+
+
+class ResourceSeries:
+    # Fixed-size time series for one container: one array('d') per field with
+    # a shared start and length, so once full the oldest sample is overwritten.
+    def __init__(self, size, user_scenario_id=None):
+        self.size = size
+        self.start = 0
+        self.count = 0
+        self.columns = {field: array('d', bytes(8 * size)) for field in FIELDS}
+        self.user_scenario_id = user_scenario_id
+        self.counters = None
+
+    def append(self, timestamp, usage, counters):
+        rates = dict.fromkeys(('network_rx_rate', 'network_tx_rate', 'block_read_rate', 'block_write_rate'), 0.0)
+        if self.counters:
+            elapsed = timestamp - self.counters['timestamp']
+            if elapsed > 0:
+                for name in ('network_rx', 'network_tx', 'block_read', 'block_write'):
+                    # Counters restart from zero with the container
+                    rates[f'{name}_rate'] = max(0, counters[name] - self.counters[name]) / elapsed
+        self.counters = dict(counters, timestamp=timestamp)
+
+        row = dict(rates, timestamp=timestamp, **usage)
+        index = (self.start + self.count) % self.size
+        for field in FIELDS:
+            self.columns[field][index] = row[field]
+        if self.count < self.size:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.size
+
+    def to_dict(self):
+        order = [(self.start + i) % self.size for i in range(self.count)]
+        return {field: [self.columns[field][i] for i in order] for field in FIELDS}
+
+    def downsample(self, points):
+        # Average consecutive samples into at most `points` buckets
+        data = self.to_dict()
+        if self.count <= points:
+            return data
+        bounds = [round(i * self.count / points) for i in range(points + 1)]
+        return {
+            field: [sum(values[a:b]) / (b - a) for a, b in zip(bounds, bounds[1:])]
+            for field, values in data.items()
+        }
+
+
+class ResourceSampler:
+    # Samples Docker stats for every container a UserScenario points at every
+    # RESOURCE_SAMPLE_INTERVAL seconds. The series live in the Django cache so
+    # all workers share them, and only the worker that claims the tick samples
+    # (with a process local cache every worker samples on its own).
+    # When a container is stopped or removed its series is rolled up into a
+    # ContainerResourceRollup row.
+    def __init__(self, manager_class):
+        self.manager_class = manager_class
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        if not settings.RESOURCE_SAMPLER_ENABLED:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling container resources: {e}")
+            finally:
+                connection.close()
+            time.sleep(settings.RESOURCE_SAMPLE_INTERVAL)
+
+    def _stats(self, target):
+        user_scenario_id, host, container_id = target
+        manager = self.manager_class(host)
+        state = manager.states.get(container_id) if settings.DOCKER_EVENTS_WATCHER else None
+        if state is not None and (not state['is_running'] or state['is_paused']):
+            return None
+        try:
+            stats = manager.client.api.stats(container_id, stream=False)
+        except Exception:
+            return None
+        from .utils import container_usage
+        return container_usage(stats), io_counters(stats)
+
+    def sample(self):
+        from .models import UserScenario
+        # One worker per interval does the sampling
+        if not cache.add(TICK_KEY, os.getpid(), timeout=max(1, settings.RESOURCE_SAMPLE_INTERVAL - 1)):
+            return 0
+
+        targets = [
+            (user_scenario_id, host or settings.DEFAULT_DOCKER_HOST, container_id)
+            for user_scenario_id, host, container_id in UserScenario.objects.filter(
+                container_id__isnull=False
+            ).values_list('id', 'docker_host', 'container_id')
+        ]
+        keys = {target: series_key(target[1], target[2]) for target in targets}
+        stored = cache.get_many(keys.values())
+
+        with ThreadPoolExecutor(max_workers=settings.DOCKER_BATCH_WORKERS) as executor:
+            results = list(executor.map(self._stats, targets))
+
+        now = time.time()
+        updates = {}
+        for target, result in zip(targets, results):
+            if result is None:
+                continue
+            series = stored.get(keys[target]) or ResourceSeries(settings.RESOURCE_SAMPLE_SIZE, target[0])
+            series.append(now, *result)
+            updates[keys[target]] = series
+        cache.set_many(updates, timeout=settings.RESOURCE_SERIES_TIMEOUT)
+
+        # Containers that disappeared without going through stop/remove
+        index = cache.get(INDEX_KEY) or set()
+        current = {(host, container_id) for _, host, container_id in targets}
+        for host, container_id in index - current:
+            self.finish(host, container_id)
+        cache.set(INDEX_KEY, current, timeout=settings.RESOURCE_SERIES_TIMEOUT)
+        return len(updates)
+
+    def series(self, host, container_id):
+        return cache.get(series_key(host, container_id))
+
+    def series_many(self, containers):
+        # containers: iterable of (host, container_id)
+        keys = {series_key(host, container_id): (host, container_id) for host, container_id in containers}
+        return {keys[key]: series for key, series in cache.get_many(keys).items()}
+
+    def finish(self, host, container_id):
+        # Must never fail the stop or remove that triggered it
+        try:
+            return self._roll_up(host, container_id)
+        except Exception as e:
+            print(f"Error rolling up resource samples for {container_id}: {e}")
+            return None
+
+    def _roll_up(self, host, container_id):
+        from .models import ContainerResourceRollup, UserScenario
+        key = series_key(host, container_id)
+        series = cache.get(key)
+        cache.delete(key)
+        if not series or not series.count:
+            return None
+
+        data = series.to_dict()
+        user_scenario_id = series.user_scenario_id
+        if user_scenario_id and not UserScenario.objects.filter(id=user_scenario_id).exists():
+            user_scenario_id = None
+        return ContainerResourceRollup.objects.create(
+            user_scenario_id=user_scenario_id,
+            docker_host=host,
+            container_id=container_id,
+            started_at=datetime.fromtimestamp(data['timestamp'][0], tz=dt_timezone.utc),
+            ended_at=datetime.fromtimestamp(data['timestamp'][-1], tz=dt_timezone.utc),
+            samples=series.count,
+            cpu_percent_avg=sum(data['cpu_percent']) / series.count,
+            cpu_percent_max=max(data['cpu_percent']),
+            memory_bytes_max=int(max(data['memory_bytes'])),
+            series=series.downsample(settings.RESOURCE_ROLLUP_POINTS),
+        )
@@ -0,0 +1,82 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from group.models import Group
+
+from .models import GroupScenario, ScenarioScreenshot, UserScenario
+from .stats import instructors_for_groups, instructors_for_user_scenario, schedule_refresh
+from .teardown import schedule_group_teardown, schedule_teardown
+
+
+# Only these fields move an instructor's dashboard counters
+STATS_FIELDS = {'completed_at', 'approval_status'}
+
+
+@receiver(pre_delete, sender=UserScenario)
+def tear_down_containers(sender, instance, origin=None, **kwargs):
+    schedule_teardown(instance, origin=origin)
+
+
+@receiver(pre_delete, sender=Group)
+def tear_down_group_containers(sender, instance, origin=None, **kwargs):
+    schedule_group_teardown(instance, origin=origin)
+
+
+# Instructor dashboard statistics. Deletes are handled before the rows go, while
+# the group memberships that lead to the instructors can still be queried.
+
+@receiver(m2m_changed, sender=Group.students.through)
+def group_students_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        schedule_refresh([instance.staff_id])
+    elif pk_set is not None:
+        schedule_refresh(instructors_for_groups(pk_set))
+    else:
+        schedule_refresh(instance.joined_group.values_list('staff_id', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    schedule_refresh([instance.staff_id])
+
+
+@receiver(post_save, sender=GroupScenario)
+@receiver(pre_delete, sender=GroupScenario)
+def group_scenario_changed(sender, instance, **kwargs):
+    schedule_refresh(instructors_for_groups([instance.group_id]))
+
+
+@receiver(post_save, sender=UserScenario)
+def user_scenario_saved(sender, instance, update_fields=None, **kwargs):
+    # Only submitted scenarios are counted and completed_at is never cleared,
+    # so container starts and stops never get past this
+    if instance.completed_at is None:
+        return
+    if update_fields is not None and not STATS_FIELDS & set(update_fields):
+        return
+    schedule_refresh(instructors_for_user_scenario(instance.user_id, instance.scenario_id))
+
+
+@receiver(pre_delete, sender=UserScenario)
+def user_scenario_deleted(sender, instance, **kwargs):
+    if instance.completed_at is None:
+        return
+    schedule_refresh(instructors_for_user_scenario(instance.user_id, instance.scenario_id))
+
+
+@receiver(post_save, sender=ScenarioScreenshot)
+@receiver(pre_delete, sender=ScenarioScreenshot)
+def screenshot_changed(sender, instance, **kwargs):
+    user_scenario = UserScenario.objects.filter(pk=instance.user_scenario_id).values('user_id', 'scenario_id').first()
+    if user_scenario:
+        schedule_refresh(instructors_for_user_scenario(user_scenario['user_id'], user_scenario['scenario_id']))
+
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Cascaded membership removals send no m2m_changed
+    schedule_refresh(instance.joined_group.values_list('staff_id', flat=True))
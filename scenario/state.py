@@ -0,0 +1,121 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from .progress import PROGRESS_LABEL
+
+
+WATCHED_EVENTS = ['start', 'restart', 'die', 'stop', 'pause', 'unpause', 'destroy']
+
+
+def container_state_from_attrs(attrs):
+    state = attrs.get('State', {})
+    is_paused = state.get('Paused', False)
+    return {
+        'name': attrs.get('Name', '').lstrip('/'),
+        'status': 'paused' if is_paused else state.get('Status'),
+        'is_paused': is_paused,
+        'is_running': state.get('Running', False),
+        'started_at': state.get('StartedAt'),
+        'progress_channel': (attrs.get('Config', {}).get('Labels') or {}).get(PROGRESS_LABEL),
+    }
+
+
+def _event_time(event):
+    if event.get('timeNano'):
+        timestamp = event['timeNano'] / 1e9
+    else:
+        timestamp = event.get('time', time.time())
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class ContainerStateCache:
+    # Mirrors the state of every container on the daemon from the events API so
+    # status lookups can be answered without a round-trip. The table is rebuilt
+    # from a full listing on startup and whenever the event stream drops.
+    RETRY_DELAY = 5
+
+    def __init__(self, client_factory):
+        self.client_factory = client_factory
+        self._states = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._synced = threading.Event()
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='container-state-watcher',
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def get(self, container_id):
+        self.ensure_started()
+        if not self._synced.is_set():
+            return None
+        with self._lock:
+            state = self._states.get(container_id)
+            return dict(state) if state else None
+
+    def reconcile(self, client):
+        states = {}
+        for container in client.containers.list(all=True):
+            states[container.id] = container_state_from_attrs(container.attrs)
+        with self._lock:
+            self._states = states
+
+    def apply_event(self, event):
+        container_id = event.get('id') or event.get('Actor', {}).get('ID')
+        action = event.get('Action') or event.get('status')
+        if not container_id or not action:
+            return
+
+        with self._lock:
+            if action == 'destroy':
+                self._states.pop(container_id, None)
+                return
+
+            # Event attributes carry the container name and labels
+            attributes = event.get('Actor', {}).get('Attributes', {})
+            state = self._states.setdefault(container_id, {
+                'name': attributes.get('name', ''),
+                'status': 'created',
+                'is_paused': False,
+                'is_running': False,
+                'started_at': None,
+                'progress_channel': attributes.get(PROGRESS_LABEL),
+            })
+            if action in ('start', 'restart'):
+                state.update(status='running', is_running=True, is_paused=False,
+                             started_at=_event_time(event))
+            elif action == 'pause':
+                state.update(status='paused', is_paused=True)
+            elif action == 'unpause':
+                state.update(status='running', is_paused=False)
+            elif action in ('die', 'stop'):
+                state.update(status='exited', is_running=False, is_paused=False)
+
+    def _run(self):
+        while True:
+            try:
+                client = self.client_factory()
+                since = int(time.time())
+                self.reconcile(client)
+                self._synced.set()
+                events = client.events(
+                    decode=True,
+                    since=since,
+                    filters={'type': 'container', 'event': WATCHED_EVENTS},
+                )
+                for event in events:
+                    self.apply_event(event)
+            except Exception as e:
+                print(f"Container event stream dropped: {e}")
+            # Until the next reconcile the table may be stale, so callers go to the daemon
+            self._synced.clear()
+            time.sleep(self.RETRY_DELAY)
@@ -0,0 +1,98 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from group.models import Group
+from .models import GroupScenario, InstructorStats, ScenarioScreenshot, UserScenario
+
+
+_pending = threading.local()
+
+
+def in_instructor_groups(instructor_id, user='user', scenario='scenario'):
+    # EXISTS conditions for "the student and the scenario are both in one of
+    # the instructor's groups". Unlike joining through both many-to-many
+    # relations they never multiply rows, so no DISTINCT is needed.
+    return (
+        Exists(GroupScenario.objects.filter(scenario=OuterRef(scenario), group__staff_id=instructor_id))
+        & Exists(Group.students.through.objects.filter(user=OuterRef(user), group__staff_id=instructor_id))
+    )
+
+
+def has_screenshots():
+    return Exists(ScenarioScreenshot.objects.filter(user_scenario=OuterRef('pk')))
+
+
+def instructor_student_scenarios(instructor_id):
+    return UserScenario.objects.filter(in_instructor_groups(instructor_id))
+
+
+def compute_instructor_stats(instructor_id):
+    groups = Group.objects.filter(staff_id=instructor_id)
+    # A student scenario counts when both the scenario and the student are in
+    # one of the instructor's groups, same as the console tables
+    student_scenarios = instructor_student_scenarios(instructor_id)
+    submitted = student_scenarios.filter(has_screenshots(), completed_at__isnull=False)
+
+    return {
+        'total_students': User.objects.filter(joined_group__staff_id=instructor_id).distinct().count(),
+        'total_scenarios': GroupScenario.objects.filter(group__staff_id=instructor_id).count(),
+        'total_groups': groups.count(),
+        'pending_approvals': submitted.filter(approval_status='pending').count(),
+        'completed_scenarios': submitted.count(),
+    }
+
+
+def refresh_instructor_stats(instructor_ids):
+    # Instructors deleted in the same transaction have nothing left to count
+    for instructor_id in User.objects.filter(pk__in=instructor_ids).values_list('pk', flat=True):
+        InstructorStats.objects.update_or_create(
+            instructor_id=instructor_id,
+            defaults=compute_instructor_stats(instructor_id)
+        )
+
+
+def get_instructor_stats(instructor):
+    stats = InstructorStats.objects.filter(pk=instructor.pk).first()
+    if stats is None:
+        stats, created = InstructorStats.objects.update_or_create(
+            instructor=instructor,
+            defaults=compute_instructor_stats(instructor.pk)
+        )
+    return stats
+
+
+def schedule_refresh(instructor_ids):
+    # Refreshes are collected per thread and run once the transaction commits,
+    # so a bulk change recomputes each affected instructor only once. Ids left
+    # over from a rolled back transaction are just refreshed with the next batch.
+    instructor_ids = {instructor_id for instructor_id in instructor_ids if instructor_id}
+    if not instructor_ids:
+        return
+    pending = getattr(_pending, 'ids', None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.update(instructor_ids)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    instructor_ids = getattr(_pending, 'ids', None)
+    _pending.ids = None
+    if instructor_ids:
+        refresh_instructor_stats(instructor_ids)
+
+
+def instructors_for_groups(group_ids):
+    return Group.objects.filter(pk__in=group_ids).values_list('staff_id', flat=True)
+
+
+def instructors_for_user_scenario(user_id, scenario_id):
+    # Same rule as in_instructor_groups: the student and the scenario may be
+    # in different groups of the instructor
+    return User.objects.filter(
+        Exists(GroupScenario.objects.filter(scenario_id=scenario_id, group__staff_id=OuterRef('pk'))),
+        Exists(Group.students.through.objects.filter(user_id=user_id, group__staff_id=OuterRef('pk'))),
+    ).values_list('pk', flat=True)
@@ -0,0 +1,102 @@
+import copy
+import threading
+import time
+from concurrent.futures import Future
+
+
+class StatusCache:
+    # Short-lived, per-process cache of container status documents. Concurrent
+    # lookups for the same container share one in-flight Docker call, and with
+    # a stale window an expired entry is served while a single background
+    # refresh runs, so a slow daemon does not stall every page.
+    def __init__(self, ttl, stale=0):
+        self.ttl = ttl
+        self.stale = stale
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'stale': 0, 'errors': 0}
+
+    def get(self, key, loader):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            age = now - entry[0] if entry else None
+
+            if entry and age < self.ttl:
+                self._counters['hits'] += 1
+                return copy.deepcopy(entry[1])
+
+            flight = self._inflight.get(key)
+            if entry and age < self.ttl + self.stale:
+                self._counters['stale'] += 1
+                if flight is None:
+                    self._refresh(key, loader)
+                return copy.deepcopy(entry[1])
+
+            if flight is not None:
+                self._counters['coalesced'] += 1
+                leader = False
+            else:
+                self._counters['misses'] += 1
+                flight = self._inflight[key] = Future()
+                leader = True
+
+        if leader:
+            self._load(key, loader, flight)
+        return copy.deepcopy(flight.result())
+
+    def peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._counters['hits'] += 1
+                return copy.deepcopy(entry[1])
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+
+    def invalidate(self, key):
+        # A call already in flight may have read the old state, so later
+        # lookups must not join it
+        with self._lock:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), inflight=len(self._inflight))
+
+    def _refresh(self, key, loader):
+        # Called with the lock held
+        flight = self._inflight[key] = Future()
+        threading.Thread(
+            target=self._load,
+            args=(key, loader, flight),
+            name='status-cache-refresh',
+            daemon=True,
+        ).start()
+
+    def _load(self, key, loader, flight):
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._counters['errors'] += 1
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.set_exception(e)
+            return
+
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+                self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            # Drop entries nobody has asked for in a while
+            cutoff = time.monotonic() - (self.ttl + self.stale) * 10
+            for old_key in [k for k, (stored_at, _) in self._entries.items() if stored_at < cutoff]:
+                del self._entries[old_key]
+        flight.set_result(value)
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from .models import GroupScenario, UserScenario
+from .utils import DockerManager
+
+
+def _remove(target):
+    host, container_id, port = target
+    docker_manager = DockerManager(host)
+    try:
+        docker_manager.remove_container(container_id, force=True, volumes=True)
+        return True
+    except Exception as e:
+        print(f"Error tearing down container {container_id} on {host}: {e}")
+        # The container is gone or unreachable, its port must not stay reserved
+        if port:
+            try:
+                docker_manager.ports.release(port=port)
+            except Exception:
+                pass
+        return False
+    finally:
+        connection.close()
+
+
+def teardown(targets):
+    # Force-remove containers with their anonymous volumes in parallel.
+    # Targets are (docker_host, container_id, port) tuples.
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(settings.DOCKER_BATCH_WORKERS, len(targets))) as executor:
+        return sum(executor.map(_remove, targets))
+
+
+def _add_to_batch(holder, user_scenario):
+    batch = getattr(holder, '_teardown_batch', None)
+    if batch is None:
+        batch = []
+        holder._teardown_batch = batch
+        transaction.on_commit(lambda: teardown(batch))
+    batch.append((user_scenario.docker_host, user_scenario.container_id, user_scenario.port))
+
+
+def schedule_teardown(user_scenario, origin=None):
+    # Called for every UserScenario a delete takes with it, including queryset
+    # and cascade deletes. Containers are collected per delete call (its
+    # origin) and removed in one parallel pass once the transaction commits.
+    if not user_scenario.container_id:
+        return
+    _add_to_batch(origin if origin is not None else user_scenario, user_scenario)
+
+
+def schedule_group_teardown(group, origin=None):
+    # Deleting a Group keeps its students' UserScenarios, but a container for
+    # one of its scenarios loses its purpose unless another group of the
+    # student still offers that scenario. Called before the delete, while the
+    # memberships can still be queried.
+    orphaned = UserScenario.objects.filter(
+        container_id__isnull=False,
+        user__joined_group=group,
+        scenario__groups__group=group
+    ).exclude(
+        Exists(GroupScenario.objects.filter(
+            scenario=OuterRef('scenario'),
+            group__students=OuterRef('user')
+        ).exclude(group=group))
+    ).distinct()
+
+    holder = origin if origin is not None else group
+    for user_scenario in orphaned:
+        _add_to_batch(holder, user_scenario)
+        user_scenario.container_id = None
+        user_scenario.port = None
+        user_scenario.save(update_fields=['container_id', 'port'])
+        user_scenario.record_stopped()
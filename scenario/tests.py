@@ -1,3 +1,383 @@
-from django.test import TestCase
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+
+from . import admission
+from .fake_docker import get_daemon, reset_daemons
+from .jobs import dispatch_queued_jobs, submit_start_job
+from .models import ContainerStartJob, Level, PortReservation, Scenario, UserScenario
+from .readiness import desktop_url
+from .status_cache import StatusCache
+from .utils import DockerManager, PortAllocator, reset_docker_client, warm_pool
+
+
+FAKE_HOSTS = {
+    'lab-1': {'base_url': 'tcp://10.0.0.1:2376', 'cpu_cores': 2, 'memory_mb': 4096},
+    'lab-2': {'base_url': 'tcp://10.0.0.2:2376', 'cpu_cores': 2, 'memory_mb': 4096,
+              'public_address': 'lab-2.example.org'},
+}
+
+
+@override_settings(
+    CONTAINER_BACKEND='fake',
+    DOCKER_HOSTS=FAKE_HOSTS,
+    DEFAULT_DOCKER_HOST='lab-1',
+    DOCKER_PLACEMENT_POLICY='least_loaded',
+    HOST_CPU_OVERCOMMIT=1.0,
+    DOCKER_EVENTS_WATCHER=False,
+    RESOURCE_SAMPLER_ENABLED=False,
+)
+class MultiHostTests(TestCase):
+    # Several fake daemons stand in for the Docker hosts. Starts are only
+    # admitted here; the executor that would run them is replaced so each test
+    # decides when a container actually starts.
+
+    def setUp(self):
+        reset_daemons()
+        for host in FAKE_HOSTS:
+            # Clients cached by an earlier test still talk to the old daemons
+            reset_docker_client(host)
+        cache.clear()
+        self.scenario = Scenario.objects.create(name='Lab', description='Lab', docker_name='lab:latest')
+        Level.objects.create(scenario=self.scenario, difficulty='beginner', tools='none', recommended_time=60)
+        executor = mock.patch('scenario.jobs.get_executor')
+        self.executor = executor.start()
+        self.addCleanup(executor.stop)
+
+    def queue_students(self, count):
+        user_scenarios = []
+        for i in range(count):
+            student = User.objects.create_user(f'student_{i}')
+            user_scenario = UserScenario.objects.create(user=student, scenario=self.scenario)
+            submit_start_job(user_scenario, dispatch=False)
+            user_scenarios.append(user_scenario)
+        dispatch_queued_jobs()
+        for user_scenario in user_scenarios:
+            user_scenario.refresh_from_db()
+        return user_scenarios
+
+    def start(self, user_scenario):
+        container_id, port = DockerManager(user_scenario.docker_host).start_container(
+            self.scenario.docker_name, user_scenario.container_name
+        )
+        user_scenario.container_id = container_id
+        user_scenario.port = port
+        user_scenario.save(update_fields=['container_id', 'port'])
+        user_scenario.record_started()
+        user_scenario.start_jobs.update(phase='ready')
+        return container_id
+
+    def test_least_loaded_spreads_students_over_hosts(self):
+        user_scenarios = self.queue_students(4)
+        hosts = [user_scenario.docker_host for user_scenario in user_scenarios]
+        self.assertEqual(sorted(hosts), ['lab-1', 'lab-1', 'lab-2', 'lab-2'])
+        self.assertEqual(self.executor.return_value.submit.call_count, 4)
+
+    @override_settings(DOCKER_PLACEMENT_POLICY='bin_packing')
+    def test_bin_packing_fills_one_host_first(self):
+        user_scenarios = self.queue_students(2)
+        self.assertEqual(user_scenarios[0].docker_host, user_scenarios[1].docker_host)
+
+    def test_starts_queue_when_every_host_is_full(self):
+        user_scenarios = self.queue_students(5)
+        phases = [user_scenario.start_jobs.get().phase for user_scenario in user_scenarios]
+        self.assertEqual(phases, ['creating'] * 4 + ['queued'])
+
+        # Finishing a start and stopping it frees a slot for the queued student
+        self.start(user_scenarios[0])
+        user_scenarios[0].record_stopped()
+        dispatch_queued_jobs()
+        user_scenarios[4].refresh_from_db()
+        self.assertEqual(user_scenarios[4].start_jobs.get().phase, 'creating')
+        self.assertEqual(user_scenarios[4].docker_host, user_scenarios[0].docker_host)
+
+    def test_containers_run_on_the_chosen_host(self):
+        user_scenarios = self.queue_students(2)
+        for user_scenario in user_scenarios:
+            container_id = self.start(user_scenario)
+            other = 'lab-2' if user_scenario.docker_host == 'lab-1' else 'lab-1'
+            self.assertIn(container_id, get_daemon(user_scenario.docker_host).containers)
+            self.assertNotIn(container_id, get_daemon(other).containers)
+            self.assertTrue(
+                DockerManager(user_scenario.docker_host).get_container_state(container_id)['is_running']
+            )
+
+    def test_stopped_containers_hold_no_budget(self):
+        user_scenario = self.queue_students(1)[0]
+        self.start(user_scenario)
+        self.assertEqual(admission.current_usage()[user_scenario.docker_host]['containers'], 1)
+        user_scenario.record_stopped()
+        self.assertEqual(admission.current_usage()[user_scenario.docker_host]['containers'], 0)
+
+    @override_settings(WARM_POOL_SIZES={'lab:latest': 1})
+    def test_idle_warm_containers_hold_budget(self):
+        warm_pool.refill('lab:latest', 'lab-1')
+        (record,) = get_daemon('lab-1').containers.values()
+        self.assertIn('mem_limit', record['host_config'])
+        self.assertEqual(admission.current_usage()['lab-1']['containers'], 1)
+
+        # Handing the container over moves it from the pool to the student
+        user_scenario = self.queue_students(1)[0]
+        self.assertEqual(user_scenario.docker_host, 'lab-2')
+        with mock.patch.object(warm_pool, 'refill_async'):
+            warm_pool.acquire('lab:latest', 'student_a', host='lab-1')
+        self.assertEqual(admission.current_usage()['lab-1']['containers'], 0)
+
+    def test_desktop_links_point_at_the_students_host(self):
+        self.assertEqual(desktop_url('lab-1', 31000), 'http://10.0.0.1:31000')
+        self.assertEqual(desktop_url('lab-2', 31000), 'http://lab-2.example.org:31000')
+
+        user_scenario = self.queue_students(1)[0]
+        self.start(user_scenario)
+        host = FAKE_HOSTS[user_scenario.docker_host]
+        address = host.get('public_address') or host['base_url'][len('tcp://'):].split(':')[0]
+        self.assertEqual(user_scenario.desktop_url, f'http://{address}:{user_scenario.port}')
+
+    def test_capacity_comes_from_the_daemon_when_not_configured(self):
+        hosts = {'lab-3': {'base_url': 'tcp://10.0.0.3:2376'}}
+        with override_settings(DOCKER_HOSTS=hosts, FAKE_DOCKER={'cpus': 6, 'memory_mb': 8192}):
+            reset_daemons()
+            budget = admission.host_budget('lab-3')
+        self.assertEqual(budget['cpus'], 6)
+        self.assertEqual(budget['memory_mb'], 8192)
+
+    def test_unreachable_hosts_get_no_students(self):
+        hosts = {
+            'up': {'base_url': 'tcp://10.0.0.4:2376'},
+            'down': {'base_url': 'tcp://10.0.0.5:2376',
+                     'fake': {'failure_rate': 1.0, 'fail_operations': ['info']}},
+        }
+        with override_settings(DOCKER_HOSTS=hosts, DEFAULT_DOCKER_HOST='up'):
+            reset_daemons()
+            usage = {
+                'up': {'containers': 3, 'cpus': 3.0, 'memory_mb': 6144},
+                'down': {'containers': 0, 'cpus': 0.0, 'memory_mb': 0},
+            }
+            limits = admission.limits_for(self.scenario)
+            self.assertFalse(admission.host_budget('down')['available'])
+            self.assertEqual(admission.choose_host(usage, limits), 'up')
+            self.assertIsNone(admission.choose_host(usage, limits, pinned='down'))
+
+    def test_existing_containers_are_not_moved_to_another_host(self):
+        def student(name, **fields):
+            user = User.objects.create_user(name)
+            return UserScenario.objects.create(user=user, scenario=self.scenario, docker_host='lab-1', **fields)
+
+        busy = [student(f'busy_{i}', container_id=f'busy_{i}', last_known_state='running') for i in range(2)]
+        returning = student('returning', container_id='returning', last_known_state='stopped')
+
+        # lab-1 is full, so the returning student waits for it while lab-2 is free
+        submit_start_job(returning, dispatch=False)
+        newcomer = UserScenario.objects.create(user=User.objects.create_user('newcomer'), scenario=self.scenario)
+        submit_start_job(newcomer, dispatch=False)
+        dispatch_queued_jobs()
+        returning.refresh_from_db()
+        newcomer.refresh_from_db()
+        self.assertEqual(returning.start_jobs.get().phase, 'queued')
+        self.assertEqual(returning.docker_host, 'lab-1')
+        self.assertEqual(newcomer.start_jobs.get().phase, 'creating')
+        self.assertEqual(newcomer.docker_host, 'lab-2')
+
+        busy[0].record_stopped()
+        dispatch_queued_jobs()
+        returning.refresh_from_db()
+        self.assertEqual(returning.start_jobs.get().phase, 'creating')
+        self.assertEqual(returning.docker_host, 'lab-1')
+
+    def test_stopped_containers_keep_their_port(self):
+        manager = DockerManager('lab-1')
+        container_id, port = manager.start_container(self.scenario.docker_name, 'student_a')
+        manager.stop_container(container_id)
+        self.assertTrue(PortReservation.objects.filter(container_name='student_a', port=port).exists())
+
+        _, other_port = manager.start_container(self.scenario.docker_name, 'student_b')
+        self.assertNotEqual(other_port, port)
+        restarted_id, restarted_port = manager.start_container(self.scenario.docker_name, 'student_a')
+        self.assertEqual((restarted_id, int(restarted_port)), (container_id, port))
+
+    def test_port_conflicts_never_remove_existing_containers(self):
+        manager = DockerManager('lab-1')
+        container_id, port = manager.start_container(self.scenario.docker_name, 'student_a')
+        manager.stop_container(container_id)
+        # Taken by another container, as a reservation released on stop used to be
+        PortReservation.objects.filter(container_name='student_a').update(container_name='student_b')
+
+        with mock.patch('scenario.utils.time.sleep'), self.assertRaises(Exception):
+            manager.start_container(self.scenario.docker_name, 'student_a')
+        self.assertIn(container_id, get_daemon('lab-1').containers)
+
+    def test_interrupted_starts_are_failed(self):
+        user_scenario = self.queue_students(1)[0]
+        job = user_scenario.start_jobs.get()
+        ContainerStartJob.objects.filter(pk=job.pk).update(updated_at=job.created_at.replace(year=2000))
+
+        retry = submit_start_job(user_scenario, dispatch=False)
+        job.refresh_from_db()
+        self.assertEqual(job.phase, 'failed')
+        self.assertNotEqual(retry.pk, job.pk)
+
+        # The interrupted worker finishing late cannot revive its job
+        self.assertFalse(job.set_phase('ready'))
+        job.refresh_from_db()
+        self.assertEqual(job.phase, 'failed')
+
+    def test_running_starts_are_kept_alive(self):
+        user_scenario = self.queue_students(1)[0]
+        job = user_scenario.start_jobs.get()
+        stale = job.created_at.replace(year=2000)
+        ContainerStartJob.objects.filter(pk=job.pk).update(updated_at=stale)
+
+        job.touch()
+        ContainerStartJob.expire_stale()
+        job.refresh_from_db()
+        self.assertEqual(job.phase, 'creating')
+        self.assertGreater(job.updated_at, stale)
+
+
+class PortAllocatorTests(TransactionTestCase):
+    # Each allocator stands in for a worker process with its own bitmap; only
+    # the database decides who gets a port. The range is small so they collide.
+
+    def in_threads(self, count, target):
+        barrier = threading.Barrier(count)
+
+        def run(i):
+            barrier.wait()
+            try:
+                return target(i)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(count) as executor:
+            return list(executor.map(run, range(count)))
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_concurrent_reserves_get_unique_ports(self):
+        allocators = [PortAllocator(30000, 30049, 'lab-1') for _ in range(4)]
+        ports = self.in_threads(8, lambda i: [
+            allocators[i % 4].reserve(f'student_{i}_{j}') for j in range(5)
+        ])
+        ports = [port for worker_ports in ports for port in worker_ports]
+        self.assertEqual(len(set(ports)), 40)
+        self.assertEqual(PortReservation.objects.count(), 40)
+
+    def test_release_frees_the_port(self):
+        allocator = PortAllocator(30000, 30000, 'lab-1')
+        port = allocator.reserve('student_a')
+        with self.assertRaises(Exception):
+            allocator.reserve('student_b')
+
+        allocator.release(container_name='student_a')
+        self.assertEqual(allocator.reserve('student_b'), port)
+        allocator.release(port=port)
+        self.assertFalse(PortReservation.objects.exists())
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_only_one_worker_wins_a_warm_container(self):
+        port = PortAllocator(30000, 30049, 'lab-1').reserve('warm_lab_1')
+        allocators = [PortAllocator(30000, 30049, 'lab-1') for _ in range(4)]
+        claimed = self.in_threads(8, lambda i: allocators[i % 4].transfer('warm_lab_1', f'student_{i}'))
+
+        winners = [i for i, claimed_port in enumerate(claimed) if claimed_port is not None]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(claimed[winners[0]], port)
+        reservation = PortReservation.objects.get()
+        self.assertEqual(reservation.container_name, f'student_{winners[0]}')
+
+
+class BlockingLoader:
+    # A status lookup that hangs like a slow daemon until released
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {'status': 'running', 'call': self.calls}
+
+
+class StatusCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch('scenario.status_cache.time.monotonic', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+            time.sleep(0.01)
+        self.fail('Timed out waiting for the cache')
+
+    def lookups(self, cache, loader, count):
+        # Starts count concurrent gets once the first one is inside the loader
+        executor = ThreadPoolExecutor(count)
+        self.addCleanup(executor.shutdown)
+        first = executor.submit(cache.get, 'key', loader)
+        loader.started.wait(5)
+        futures = [first] + [executor.submit(cache.get, 'key', loader) for _ in range(count - 1)]
+        self.wait_for(lambda: cache.stats()['coalesced'] == count - 1)
+        return futures
+
+    def test_concurrent_lookups_share_one_load(self):
+        cache = StatusCache(ttl=2)
+        loader = BlockingLoader()
+        futures = self.lookups(cache, loader, 8)
+        loader.release.set()
+
+        self.assertEqual([future.result(5) for future in futures], [{'status': 'running', 'call': 1}] * 8)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(cache.get('key', loader), {'status': 'running', 'call': 1})
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self):
+        cache = StatusCache(ttl=2)
+        loader = BlockingLoader(error=RuntimeError('daemon down'))
+        futures = self.lookups(cache, loader, 4)
+        loader.release.set()
+
+        for future in futures:
+            with self.assertRaisesMessage(RuntimeError, 'daemon down'):
+                future.result(5)
+        self.assertIsNone(cache.peek('key'))
+        loader.error = None
+        self.assertEqual(cache.get('key', loader), {'status': 'running', 'call': 2})
+
+    def test_stale_entries_are_served_during_one_refresh(self):
+        cache = StatusCache(ttl=2, stale=10)
+        cache.put('key', {'status': 'exited'})
+        self.now += 5
+        loader = BlockingLoader()
+
+        for _ in range(5):
+            self.assertEqual(cache.get('key', loader), {'status': 'exited'})
+        loader.started.wait(5)
+        self.assertEqual(loader.calls, 1)
+
+        loader.release.set()
+        self.wait_for(lambda: cache.stats()['inflight'] == 0)
+        self.assertEqual(cache.get('key', loader), {'status': 'running', 'call': 1})
+
+    def test_invalidate_during_a_load_keeps_its_result_out(self):
+        cache = StatusCache(ttl=2)
+        loader = BlockingLoader()
+        (future,) = self.lookups(cache, loader, 1)
+        cache.invalidate('key')
+        loader.release.set()
+
+        # The caller still gets its answer, but later lookups load again
+        self.assertEqual(future.result(5), {'status': 'running', 'call': 1})
+        self.assertIsNone(cache.peek('key'))
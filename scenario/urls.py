@@ -8,12 +8,19 @@ urlpatterns = [
     path('', include([
         path('all/', views.list_all_scenarios, name='list_all_scenarios'),
         path('console/', views.console, name='console'),
+        path('warm-pool/', views.warm_pool_status, name='warm_pool_status'),
+        path('progress/', views.report_progress, name='report_progress'),
+        path('status-cache/', views.status_cache_stats, name='status_cache_stats'),
+        path('metrics/', views.metrics, name='metrics'),
+        path('resources/', views.resource_usage, name='resource_usage'),
+        path('start-metrics/', views.start_metrics_page, name='start_metrics'),
     ])),
 
     # Group-specific operations
     path('group/<int:group_id>/', include([
         path('', views.scenario_list, name='scenario_list'),
         path('create/', views.create_scenario, name='create_scenario'),
+        path('<int:scenario_id>/provision/', views.provision_lab, name='provision_lab'),
     ])),
 
     # Scenario-specific operations
@@ -29,7 +36,9 @@ urlpatterns = [
         # Container management
         path('container/', include([
             path('status/', views.get_container_status, name='container_status'),
+            path('stream/', views.stream_container_status, name='container_stream'),
             path('action/', views.container_action, name='container_action'),
+            path('job/<uuid:job_id>/', views.start_job_status, name='start_job_status'),
         ])),
     ])),
 
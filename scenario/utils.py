@@ -1,190 +1,575 @@
 import docker
 from docker import errors
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import os
 import random
+import threading
 from datetime import datetime
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
+from requests.exceptions import ConnectionError as DockerConnectionError
 import time
 
+from .fake_docker import FakeDockerClient
+from .metrics import StartTimer
+from .progress import PROGRESS_LABEL, LogFollower, forget_progress, new_progress_channel, reported_progress
+from .readiness import ReadinessProbe, bound_port
+from .sampler import ResourceSampler
+from .state import ContainerStateCache, container_state_from_attrs
+from .status_cache import StatusCache
+from .warm_pool import WarmPool
 
-class DockerManager:
-    def __init__(self):
-        self.client = docker.from_env()
-        self.MIN_PORT = 30000
-        self.MAX_PORT = 50000
-
-    def get_available_port(self):
-        used_ports = set()
-        containers = self.client.containers.list()
-        for container in containers:
-            ports = container.attrs['HostConfig']['PortBindings'] or {}
-            for port_bindings in ports.values():
-                for binding in port_bindings:
-                    if binding and 'HostPort' in binding:
-                        used_ports.add(int(binding['HostPort']))
-        while True:
-            port = random.randint(self.MIN_PORT, self.MAX_PORT)
-            if port not in used_ports:
+
+def parse_docker_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def refresh_runtime(status):
+    # Cached documents keep their started_at, the runtime is always current
+    container_status = status['container_status']
+    if container_status['started_at'] and container_status['is_running'] and not container_status['is_paused']:
+        started_at = parse_docker_time(container_status['started_at'])
+        container_status['runtime'] = int((timezone.now() - started_at).total_seconds())
+
+
+def container_usage(stats):
+    # Same CPU% formula as `docker stats`
+    cpu_stats = stats.get('cpu_stats', {})
+    precpu_stats = stats.get('precpu_stats', {})
+    cpu_delta = (cpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+                 - precpu_stats.get('cpu_usage', {}).get('total_usage', 0))
+    system_delta = cpu_stats.get('system_cpu_usage', 0) - precpu_stats.get('system_cpu_usage', 0)
+    online_cpus = cpu_stats.get('online_cpus') or len(cpu_stats.get('cpu_usage', {}).get('percpu_usage') or [1])
+    cpu_percent = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        cpu_percent = cpu_delta / system_delta * online_cpus * 100.0
+
+    memory = stats.get('memory_stats', {})
+    memory_usage = memory.get('usage', 0) - memory.get('stats', {}).get('inactive_file', 0)
+    return {
+        'cpu_percent': round(cpu_percent, 2),
+        'memory_bytes': max(memory_usage, 0),
+    }
+
+
+def resolve_host(host):
+    return host or settings.DEFAULT_DOCKER_HOST
+
+
+def _create_client(host):
+    if settings.CONTAINER_BACKEND == 'fake':
+        return FakeDockerClient(host)
+    config = settings.DOCKER_HOSTS.get(host, {})
+    kwargs = {
+        'max_pool_size': settings.DOCKER_POOL_SIZE,
+        'timeout': settings.DOCKER_TIMEOUT,
+    }
+    if config.get('base_url'):
+        return docker.DockerClient(base_url=config['base_url'], tls=config.get('tls', False), **kwargs)
+    return docker.from_env(**kwargs)
+
+
+# One Docker client (and therefore one HTTP connection pool) per host per process.
+_clients = {}
+_clients_pid = None
+_client_lock = threading.Lock()
+
+
+def get_docker_client(host=None):
+    global _clients_pid
+    host = resolve_host(host)
+    pid = os.getpid()
+    client = _clients.get(host) if _clients_pid == pid else None
+    if client is None:
+        with _client_lock:
+            if _clients_pid != pid:
+                _clients.clear()
+                _clients_pid = pid
+            client = _clients.get(host)
+            if client is None:
+                client = _clients[host] = _create_client(host)
+    return client
+
+
+def reset_docker_client(host=None):
+    host = resolve_host(host)
+    with _client_lock:
+        client = _clients.pop(host, None) if _clients_pid == os.getpid() else None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _forget_clients_after_fork():
+    # The parent's sockets must never be shared with a forked worker
+    global _clients, _clients_pid, _client_lock
+    _clients = {}
+    _clients_pid = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_clients_after_fork)
+
+
+def reconnecting(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        except DockerConnectionError:
+            reset_docker_client(self.host)
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+log_follower = LogFollower()
+status_cache = StatusCache(settings.STATUS_CACHE_TTL, stale=settings.STATUS_CACHE_STALE)
+_host_states = {}
+_host_ports = {}
+_registry_lock = threading.Lock()
+
+
+def container_states_for(host):
+    host = resolve_host(host)
+    with _registry_lock:
+        if host not in _host_states:
+            _host_states[host] = ContainerStateCache(functools.partial(get_docker_client, host))
+        return _host_states[host]
+
+
+def port_allocator_for(host):
+    host = resolve_host(host)
+    with _registry_lock:
+        if host not in _host_ports:
+            _host_ports[host] = PortAllocator(DockerManager.MIN_PORT, DockerManager.MAX_PORT, host)
+        return _host_ports[host]
+
+
+class PortAllocator:
+    # Ports are reserved in the database (unique per host and on container name)
+    # so concurrent starts in different workers can never hand out the same port.
+    # The bitmap is only a per-process hint of which ports are already taken.
+    def __init__(self, min_port, max_port, host):
+        self.min_port = min_port
+        self.max_port = max_port
+        self.host = host
+        self._lock = threading.Lock()
+        self._used = None
+        self._cursor = 0
+
+    def _load(self):
+        from .models import PortReservation
+        used = bytearray(self.max_port - self.min_port + 1)
+        for port in PortReservation.objects.filter(docker_host=self.host).values_list('port', flat=True):
+            if self.min_port <= port <= self.max_port:
+                used[port - self.min_port] = 1
+        self._used = used
+        self._cursor = random.randrange(len(used))
+
+    def _try_create(self, port, container_name):
+        from .models import PortReservation
+        try:
+            with transaction.atomic():
+                PortReservation.objects.create(docker_host=self.host, port=port, container_name=container_name)
+            return True
+        except IntegrityError:
+            return False
+
+    def reserve(self, container_name, port=None):
+        from .models import PortReservation
+        existing = PortReservation.objects.filter(container_name=container_name).first()
+        if existing:
+            if existing.docker_host == self.host and (port is None or existing.port == int(port)):
+                return existing.port
+            existing.delete()
+
+        with self._lock:
+            if self._used is None:
+                self._load()
+
+            if port is not None:
+                port = int(port)
+                if not self._try_create(port, container_name):
+                    raise Exception(f"Port {port} is already reserved by another container")
+                if self.min_port <= port <= self.max_port:
+                    self._used[port - self.min_port] = 1
                 return port
 
-    def start_container(self, image_name, container_name):
+            for reload in (False, True):
+                if reload:
+                    self._load()
+                size = len(self._used)
+                for _ in range(size):
+                    index = self._cursor
+                    self._cursor = (index + 1) % size
+                    if self._used[index]:
+                        continue
+                    self._used[index] = 1
+                    if self._try_create(self.min_port + index, container_name):
+                        return self.min_port + index
+                    # Lost a race for the same name, reuse whatever the winner reserved
+                    existing = PortReservation.objects.filter(container_name=container_name).first()
+                    if existing:
+                        return existing.port
+
+        raise Exception("No free ports left in the scenario port range")
+
+    def transfer(self, old_name, new_name):
+        from .models import PortReservation
+        reservation = PortReservation.objects.filter(container_name=old_name).first()
+        if not reservation:
+            return None
+        # Only one worker can win the rename, which makes this a safe claim
+        claimed = PortReservation.objects.filter(
+            pk=reservation.pk,
+            container_name=old_name
+        ).update(container_name=new_name)
+        return reservation.port if claimed else None
+
+    def release(self, container_name=None, port=None):
+        from .models import PortReservation
+        reservations = PortReservation.objects.all()
+        if container_name is not None:
+            reservations = reservations.filter(container_name=container_name)
+        elif port is not None:
+            reservations = reservations.filter(docker_host=self.host, port=port)
+        else:
+            return
+        ports = list(reservations.filter(docker_host=self.host).values_list('port', flat=True))
+        reservations.delete()
+        with self._lock:
+            if self._used is not None:
+                for freed in ports:
+                    if self.min_port <= freed <= self.max_port:
+                        self._used[freed - self.min_port] = 0
+
+
+class DockerManager:
+    MIN_PORT = 30000
+    MAX_PORT = 50000
+
+    def __init__(self, host=None):
+        self.host = resolve_host(host)
+
+    @property
+    def client(self):
+        return get_docker_client(self.host)
+
+    @property
+    def ports(self):
+        return port_allocator_for(self.host)
+
+    @property
+    def states(self):
+        return container_states_for(self.host)
+
+    def get_available_port(self, container_name):
+        return self.ports.reserve(container_name)
+
+    def resource_kwargs(self, limits):
+        if not limits:
+            return {}
+        memory = f"{limits['memory_mb']}m"
+        return {
+            'cpu_period': 100000,
+            'cpu_quota': int(limits['cpus'] * 100000),
+            'mem_limit': memory,
+            'memswap_limit': memory,
+        }
+
+    def apply_limits(self, container, limits):
+        if limits:
+            container.update(**self.resource_kwargs(limits))
+
+    def run_container(self, image_name, container_name, port, labels=None, limits=None):
+        environment = {
+            'PYTHONUNBUFFERED': '1',
+            'PORT': '3000'  # Ensure container knows which port to use
+        }
+        labels = dict(labels or {})
+        extra_hosts = {}
+        if settings.PROGRESS_INGEST_URL:
+            # fyp.py posts its progress here instead of us scraping the logs
+            channel, token = new_progress_channel()
+            labels[PROGRESS_LABEL] = channel
+            environment['PROGRESS_URL'] = settings.PROGRESS_INGEST_URL
+            environment['PROGRESS_TOKEN'] = token
+            extra_hosts['host.docker.internal'] = 'host-gateway'
+
+        return self.client.containers.run(
+            image=image_name,
+            name=container_name,
+            detach=True,
+            ports={'3000/tcp': port},
+            privileged=True,
+            environment=environment,
+            restart_policy={"Name": "unless-stopped"},
+            labels=labels,
+            extra_hosts=extra_hosts,
+            **self.resource_kwargs(limits)
+        )
+
+    def start_container(self, image_name, container_name, on_phase=None, limits=None, timer=None):
+        timer = timer or StartTimer()
+        try:
+            result = self._start_container(image_name, container_name, on_phase, limits, timer)
+        except Exception:
+            timer.finish('failed')
+            raise
+        timer.finish(timer.outcome)
+        return result
+
+    def ensure_image(self, image_name):
+        # Pull explicitly so the download is not hidden inside containers.run
+        try:
+            self.client.images.get(image_name)
+        except docker.errors.ImageNotFound:
+            self.client.images.pull(image_name)
+
+    def _start_container(self, image_name, container_name, on_phase, limits, timer):
         max_retries = 2
         last_error = None
+        if on_phase is None:
+            on_phase = lambda phase: None
         
         for attempt in range(max_retries):
+            timer.attempts += 1
+            existing = False
             try:
+                on_phase('creating')
                 # Try to get existing container
                 try:
                     container = self.client.containers.get(container_name)
                     container.reload()
+                    existing = True
+                    timer.lap('lookup')
+                    timer.outcome = 'existing'
                     
                     # If container exists but is not running, start it
                     if container.status != 'running':
+                        # Claim the port it is bound to before starting, so
+                        # a port handed out meanwhile fails here and not in docker
+                        port = bound_port(container)
+                        if port:
+                            self.ports.reserve(container_name, port=port)
+                        self.apply_limits(container, limits)
                         container.start()
-                        
-                    # Wait for container to be ready
-                    for _ in range(30):  # 30 seconds timeout
-                        container.reload()
-                        if container.status == 'running':
-                            # Check if port mapping exists
-                            if '3000/tcp' in container.ports:
-                                return container.id, container.ports['3000/tcp'][0]['HostPort']
-                            break
-                        time.sleep(1)
-                        
-                    # If we got here without returning, port mapping failed
-                    raise Exception("Container started but port mapping failed")
-                    
+                    timer.lap('start')
+                    on_phase('starting')
+
+                    port = ReadinessProbe(self).wait(container)
+                    self.ports.reserve(container_name, port=port)
+                    timer.lap('ready_wait')
+                    return container.id, port
+
                 except docker.errors.NotFound:
+                    timer.lap('lookup')
+                    timer.outcome = 'new'
+                    # Hand over an already booted container if the pool has one
+                    warm = warm_pool.acquire(image_name, container_name, limits=limits, host=self.host)
+                    timer.lap('warm_pool')
+                    if warm:
+                        timer.outcome = 'warm'
+                        # Pool containers may have been handed over straight after booting
+                        ReadinessProbe(self).wait(self.client.containers.get(warm[0]))
+                        timer.lap('ready_wait')
+                        return warm
+
                     # Container doesn't exist, create new one
-                    port = self.get_available_port()
-                    environment = {
-                        'PYTHONUNBUFFERED': '1',
-                        'PORT': '3000'  # Ensure container knows which port to use
-                    }
-                    
-                    container = self.client.containers.run(
-                        image=image_name,
-                        name=container_name,
-                        detach=True,
-                        ports={'3000/tcp': port},
-                        privileged=True,
-                        environment=environment,
-                        restart_policy={"Name": "unless-stopped"},
-                    )
-                    
-                    # Wait for container to be ready
-                    for _ in range(30):  # 30 seconds timeout
-                        container.reload()
-                        if container.status == 'running' and '3000/tcp' in container.ports:
-                            return container.id, port
-                        time.sleep(1)
-                    
-                    raise Exception("Container created but failed to start properly")
+                    port = self.get_available_port(container_name)
+                    timer.lap('port')
+                    self.ensure_image(image_name)
+                    timer.lap('pull')
+                    container = self.run_container(image_name, container_name, port, limits=limits)
+                    timer.lap('run')
+                    on_phase('starting')
+
+                    ReadinessProbe(self).wait(container)
+                    timer.lap('ready_wait')
+                    return container.id, port
                     
             except Exception as e:
                 last_error = str(e)
+                if isinstance(e, DockerConnectionError):
+                    reset_docker_client(self.host)
                 if attempt < max_retries - 1:
-                    # Try to cleanup before retry
-                    try:
-                        container = self.client.containers.get(container_name)
-                        container.remove(force=True)
-                    except:
-                        pass
+                    # Try to cleanup before retry, but never remove a student's
+                    # existing container and the work in it
+                    if not existing:
+                        try:
+                            container = self.client.containers.get(container_name)
+                            container.remove(force=True)
+                            log_follower.forget(container.id)
+                        except:
+                            pass
+                        self.ports.release(container_name=container_name)
                     time.sleep(2)  # Wait before retry
+                    timer.lap('retry')
                     continue
                 else:
                     raise Exception(f"Failed to start container after {max_retries} attempts: {last_error}")
 
-    def get_container_status(self, container_id):
-        try:
+    def get_container_state(self, container_id):
+        state = None
+        if settings.DOCKER_EVENTS_WATCHER:
+            state = self.states.get(container_id)
+        if state is None:
             container = self.client.containers.get(container_id)
-            container.reload()
+            state = container_state_from_attrs(container.attrs)
+        return state
 
-            status = container.status
-            state = container.attrs.get('State', {})
-            started_at = state.get('StartedAt')
-            is_paused = state.get('Paused', False)
-            is_running = state.get('Running', False)
-            
-            # If container is paused, ensure status is correct
-            if is_paused:
-                status = 'paused'
-
-            runtime = 0
-            if started_at and is_running and not is_paused:
-                started_time = datetime.fromisoformat(started_at.replace('Z', '+00:00'))
-                runtime = int((timezone.now() - started_time).total_seconds())
-            
-            progress = 0
-            level = None
-            logs = ''
+    def build_status(self, container_id, state, include_logs=False, logs_since=None, read_logs=True):
+        status = state['status']
+        started_at = state['started_at']
+        is_paused = state['is_paused']
+        is_running = state['is_running']
+
+        runtime = 0
+        if started_at and is_running and not is_paused:
+            runtime = int((timezone.now() - parse_docker_time(started_at)).total_seconds())
+
+        progress = 0
+        level = None
+        logs = ''
+        log_cursor = None
+        reported = reported_progress(state.get('progress_channel'))
+        if reported:
+            progress = reported['progress']
+            level = reported['level']
+        if not include_logs and not reported and not read_logs:
+            progress, level = log_follower.last(container_id)
+        elif include_logs or not reported:
+            # Images without the progress channel still print "Progress: N"
             try:
-                logs = container.logs(tail=100).decode('utf-8')
-                for line in logs.split('\n'):
-                    if "Progress:" in line:
-                        try:
-                            progress_str = line.split("Progress:")[1].strip().replace('%', '')
-                            progress = int(progress_str)
-                        except (IndexError, ValueError):
-                            continue
-                    elif "Level:" in line:
-                        try:
-                            level = line.split("Level:")[1].strip()
-                        except (IndexError, ValueError):
-                            continue
+                progress_info = log_follower.read(self.client.api, container_id, since=logs_since)
+                if not reported:
+                    progress = progress_info['progress']
+                    level = progress_info['level']
+                if include_logs:
+                    logs = progress_info['logs']
+                    log_cursor = progress_info['cursor']
             except Exception as e:
                 print(f"Error reading logs: {e}")
 
-            return {
-                'status': 'success',
-                'container_status': {
-                    'status': status,
-                    'is_paused': is_paused,
-                    'is_running': is_running,
-                    'started_at': started_at,
-                    'runtime': runtime
-                },
-                'progress_info': {
-                    'progress': progress,
-                    'level': level,
-                    'logs': logs
-                }
+        return {
+            'status': 'success',
+            'container_status': {
+                'status': status,
+                'is_paused': is_paused,
+                'is_running': is_running,
+                'started_at': started_at,
+                'runtime': runtime
+            },
+            'progress_info': {
+                'progress': progress,
+                'level': level,
+                'logs': logs,
+                'log_cursor': log_cursor
             }
+        }
 
-        except docker.errors.NotFound:
-            return {
-                'status': 'error',
-                'container_status': {
-                    'status': 'stopped',
-                    'is_paused': False,
-                    'is_running': False,
-                    'started_at': None,
-                    'runtime': 0
-                },
-                'progress_info': {
-                    'progress': 0,
-                    'level': None,
-                    'logs': 'Container not found'
-                }
+    def build_error_status(self, status, message):
+        return {
+            'status': 'error',
+            'container_status': {
+                'status': status,
+                'is_paused': False,
+                'is_running': False,
+                'started_at': None,
+                'runtime': 0
+            },
+            'progress_info': {
+                'progress': 0,
+                'level': None,
+                'logs': message
             }
+        }
+
+    @reconnecting
+    def get_container_status(self, container_id, include_logs=False, logs_since=None):
+        if include_logs:
+            return self.load_container_status(container_id, include_logs=True, logs_since=logs_since)
+        # Tabs and the console asking about the same container share one lookup
+        status = status_cache.get(
+            (self.host, container_id),
+            functools.partial(self.load_container_status, container_id)
+        )
+        refresh_runtime(status)
+        return status
+
+    def load_container_status(self, container_id, include_logs=False, logs_since=None):
+        try:
+            state = self.get_container_state(container_id)
+            return self.build_status(container_id, state, include_logs=include_logs, logs_since=logs_since)
+        except docker.errors.NotFound:
+            return self.build_error_status('stopped', 'Container not found')
+        except DockerConnectionError:
+            raise
         except Exception as e:
             print(f"Error getting container status: {str(e)}")
-            return {
-                'status': 'error',
-                'container_status': {
-                    'status': 'error',
-                    'is_paused': False,
-                    'is_running': False,
+            return self.build_error_status('error', str(e))
+
+    @reconnecting
+    def get_container_statuses(self, container_ids):
+        container_ids = [container_id for container_id in set(container_ids) if container_id]
+        if not container_ids:
+            return {}
+
+        statuses = {}
+        states = {}
+        missing = []
+        for container_id in container_ids:
+            cached = status_cache.peek((self.host, container_id))
+            if cached is not None:
+                refresh_runtime(cached)
+                statuses[container_id] = cached
+                continue
+            state = self.states.get(container_id) if settings.DOCKER_EVENTS_WATCHER else None
+            if state is None:
+                missing.append(container_id)
+            else:
+                states[container_id] = state
+
+        # Whatever the event cache does not know is resolved with one filtered listing
+        if missing:
+            for container in self.client.containers.list(all=True, sparse=True, filters={'id': missing}):
+                state = container.attrs.get('State', '')
+                states[container.id] = {
+                    'name': (container.attrs.get('Names') or [''])[0].lstrip('/'),
+                    'status': state,
+                    'is_paused': state == 'paused',
+                    'is_running': state in ('running', 'paused'),
                     'started_at': None,
-                    'runtime': 0
-                },
-                'progress_info': {
-                    'progress': 0,
-                    'level': None,
-                    'logs': str(e)
+                    'progress_channel': (container.attrs.get('Labels') or {}).get(PROGRESS_LABEL),
                 }
+
+        with ThreadPoolExecutor(max_workers=settings.DOCKER_BATCH_WORKERS) as executor:
+            futures = {
+                container_id: executor.submit(self.build_status, container_id, state)
+                for container_id, state in states.items()
             }
+            for container_id in container_ids:
+                if container_id in statuses:
+                    continue
+                if container_id in futures:
+                    statuses[container_id] = futures[container_id].result()
+                else:
+                    statuses[container_id] = self.build_error_status('stopped', 'Container not found')
+                # Sparse listings carry no start time, so only full states are shared
+                if container_id not in missing:
+                    status_cache.put((self.host, container_id), statuses[container_id])
+        return statuses
 
+    @reconnecting
+    def get_container_usage(self, container_id):
+        return container_usage(self.client.api.stats(container_id, stream=False))
+
+    @reconnecting
     def stop_container(self, container_id):
         try:
             container = self.client.containers.get(container_id)
@@ -194,14 +579,20 @@ class DockerManager:
                 raise Exception("Container is already stopped")
             
             container.stop()
+            # The port stays reserved, the stopped container is still bound to it
+            status_cache.invalidate((self.host, container_id))
+            resource_sampler.finish(self.host, container_id)
             return True
-            
+
+        except DockerConnectionError:
+            raise
         except Exception as e:
             error_message = str(e)
             if "Failed to stop container: " in error_message:
                 error_message = error_message.replace("Failed to stop container: ", "")
             raise Exception(error_message)
 
+    @reconnecting
     def pause_container(self, container_id):
         try:
             container = self.client.containers.get(container_id)
@@ -211,14 +602,18 @@ class DockerManager:
                 raise Exception("Container is already paused")
             
             container.pause()
+            status_cache.invalidate((self.host, container_id))
             return True
-            
+
+        except DockerConnectionError:
+            raise
         except Exception as e:
             error_message = str(e)
             if "Failed to pause container: " in error_message:
                 error_message = error_message.replace("Failed to pause container: ", "")
             raise Exception(error_message)
 
+    @reconnecting
     def unpause_container(self, container_id):
         try:
             container = self.client.containers.get(container_id)
@@ -228,8 +623,11 @@ class DockerManager:
                 raise Exception("Container is not paused")
             
             container.unpause()
+            status_cache.invalidate((self.host, container_id))
             return True
-            
+
+        except DockerConnectionError:
+            raise
         except Exception as e:
             # Extract original error message to avoid duplicate wrapping
             error_message = str(e)
@@ -237,18 +635,34 @@ class DockerManager:
                 error_message = error_message.replace("Failed to unpause container: ", "")
             raise Exception(error_message)
 
+    @reconnecting
     def restart_container(self, container_id):
         try:
             container = self.client.containers.get(container_id)
             container.restart()
+            status_cache.invalidate((self.host, container_id))
             return True
+        except DockerConnectionError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to restart container: {str(e)}")
 
-    def remove_container(self, container_id):
+    @reconnecting
+    def remove_container(self, container_id, force=False, volumes=False):
         try:
             container = self.client.containers.get(container_id)
-            container.remove()
+            container.remove(force=force, v=volumes)
+            status_cache.invalidate((self.host, container_id))
+            self.ports.release(container_name=container.name)
+            log_follower.forget(container.id)
+            forget_progress(container.labels.get(PROGRESS_LABEL))
+            resource_sampler.finish(self.host, container_id)
             return True
+        except DockerConnectionError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to remove container: {str(e)}")
+
+
+warm_pool = WarmPool(DockerManager)
+resource_sampler = ResourceSampler(DockerManager)
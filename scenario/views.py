@@ -2,18 +2,36 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from group.models import Group
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Avg, Count, Max, Subquery, OuterRef
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.db.models import Avg, Max, Subquery, OuterRef
 from django.contrib.auth.decorators import user_passes_test
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from scenario.models import *
-from .utils import DockerManager
+from .images import prepull_images_async
+from .metrics import render_prometheus, start_metrics
+from .progress import channel_from_token, record_progress
+from . import admission
+from .jobs import dispatch_queued_jobs, provision_progress, provision_students, submit_start_job
+from .stats import get_instructor_stats, has_screenshots, instructor_student_scenarios
+from .utils import DockerManager, resource_sampler, status_cache, warm_pool
 from django.utils import timezone
 from quiz.models import Quiz, QuizAttempt
 from rating.models import ScenarioRating
 from django.contrib.auth.models import User
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+import asyncio
+import hashlib
+import json
+import secrets
+import time
+from collections import defaultdict
 from datetime import timedelta
+from django.conf import settings
 
 
 @login_required
@@ -30,6 +48,37 @@ def scenario_list(request, group_id):
     return render(request, 'Scenario.html', context)
 
 
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@require_http_methods(["GET", "POST"])
+def provision_lab(request, group_id, scenario_id):
+    group = get_object_or_404(Group, id=group_id)
+    scenario = get_object_or_404(Scenario, id=scenario_id, groups__group=group)
+    students = group.students.order_by('username')
+
+    if request.method == 'POST':
+        try:
+            jobs = provision_students(scenario, students)
+            messages.success(request, f'Provisioning {len(jobs)} environments for {group.name}.')
+        except Exception as e:
+            messages.error(request, f'Failed to provision lab: {str(e)}')
+        return redirect('scenario:provision_lab', group_id=group_id, scenario_id=scenario_id)
+
+    rows = provision_progress(scenario, students)
+    if any(row['phase'] == 'queued' for row in rows):
+        dispatch_queued_jobs()
+        rows = provision_progress(scenario, students)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'status': 'success', 'students': rows})
+
+    return render(request, 'ProvisionLab.html', {
+        'group': group,
+        'scenario': scenario,
+        'students': rows,
+    })
+
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
 def create_scenario(request, group_id):
@@ -46,6 +95,7 @@ def create_scenario(request, group_id):
         )
 
         GroupScenario.objects.create(group=group, scenario=scenario)
+        prepull_images_async([scenario.docker_name])
         messages.success(request, 'Scenario created successfully!')
         return redirect('group:group_detail', group_id=group_id)
 
@@ -63,12 +113,17 @@ def edit_scenario(request, scenario_id):
         docker_image = request.POST.get('docker_image')
         time_limit = request.POST.get('time_limit', 60)
 
+        image_changed = scenario.docker_name != docker_image
+
         scenario.name = name
         scenario.description = description
         scenario.docker_name = docker_image
         scenario.time_limit = time_limit
         scenario.save()
 
+        if image_changed:
+            prepull_images_async([scenario.docker_name])
+
         messages.success(request, 'Scenario updated successfully!')
         return redirect('scenario:list_all_scenarios')
 
@@ -169,8 +224,6 @@ def start_scenario(request, scenario_id):
             messages.info(request, 'You have already completed this scenario.')
             return redirect('scenario:scenario_list', group_id=scenario.groups.first().group.id)
 
-    docker_manager = DockerManager()
-
     # Get or create user scenario
     user_scenario, created = UserScenario.objects.get_or_create(
         scenario=scenario,
@@ -178,48 +231,92 @@ def start_scenario(request, scenario_id):
         completed_at__isnull=True,
         defaults={'container_id': None, 'port': None}
     )
+    docker_manager = DockerManager(user_scenario.docker_host)
 
     try:
         # Check if container exists and is running
         if user_scenario.container_id:
-            try:
-                status = docker_manager.get_container_status(user_scenario.container_id)
-                if status['status'] == 'success' and status['container_status']['is_running']:
-                    # Container is running, redirect to detail page
-                    messages.info(request, 'Scenario is already running')
-                    return redirect('scenario:scenario_detail', scenario_id=scenario_id)
-                else:
-                    # Container exists but not running, clean it up
-                    try:
-                        docker_manager.start_container(user_scenario.container_id)
-                    except Exception as e:
-                        print(f"Error cleaning up non-running container: {e}")
-            except Exception as e:
-                print(f"Error checking container status: {e}")
-                # Container likely doesn't exist anymore, clean up reference
-                user_scenario.container_id = None
-                user_scenario.port = None
-                user_scenario.save()
-
-        # Start new container
-        container_name = f"{request.user.username}_{scenario.name}".replace(' ', '_').lower()
-        container_id, port = docker_manager.start_container(
-            scenario.docker_name,
-            container_name
-        )
-
-        user_scenario.container_id = container_id
-        user_scenario.port = port
-        user_scenario.save()
+            status = docker_manager.get_container_status(user_scenario.container_id)
+            if status['status'] == 'success' and status['container_status']['is_running']:
+                # Container is running, redirect to detail page
+                messages.info(request, 'Scenario is already running')
+                return redirect('scenario:scenario_detail', scenario_id=scenario_id)
 
-        messages.success(request, f'Scenario started successfully! Access it at port {port}')
-        return redirect('scenario:scenario_detail', scenario_id=scenario_id)
+        job = submit_start_job(user_scenario)
+        return start_job_response(request, job, scenario_id)
 
     except Exception as e:
         messages.error(request, f'Failed to start scenario: {str(e)}')
         return redirect('scenario:scenario_list', group_id=scenario.groups.first().group.id)
 
 
+def start_job_response(request, job, scenario_id):
+    job.refresh_from_db()
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'status': 'success',
+            'job_id': str(job.id),
+            'phase': job.phase,
+            'queue_position': admission.queue_position(job),
+            'job_url': reverse('scenario:start_job_status', args=[scenario_id, job.id])
+        }, status=202)
+
+    position = admission.queue_position(job)
+    if position:
+        messages.info(request, f'The lab is at capacity. You are number {position} in the start queue.')
+    else:
+        messages.info(request, 'Your scenario is starting. The desktop will be ready in a moment.')
+    return redirect('scenario:scenario_detail', scenario_id=scenario_id)
+
+
+@login_required
+def start_job_status(request, scenario_id, job_id):
+    job = get_object_or_404(
+        ContainerStartJob.objects.select_related('user_scenario'),
+        id=job_id,
+        user_scenario__scenario_id=scenario_id,
+        user_scenario__user=request.user
+    )
+    if job.phase == 'queued':
+        dispatch_queued_jobs()
+        job.refresh_from_db()
+
+    return JsonResponse({
+        'status': 'success',
+        'job_id': str(job.id),
+        'phase': job.phase,
+        'queue_position': admission.queue_position(job),
+        'error': job.error,
+        'port': job.user_scenario.port if job.phase == 'ready' else None,
+        'desktop_url': job.user_scenario.desktop_url if job.phase == 'ready' else None
+    })
+
+
+@csrf_exempt
+@require_POST
+def report_progress(request):
+    # Called from inside scenario containers, authenticated by the signed
+    # channel token the container was started with
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    channel = channel_from_token(token)
+    if not channel:
+        return JsonResponse({'status': 'error', 'message': 'Invalid token'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        progress = data.get('progress')
+        level = data.get('level')
+        if progress is not None:
+            progress = max(0, min(100, int(progress)))
+        if level is not None:
+            level = str(level)[:50]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid progress report'}, status=400)
+
+    record_progress(channel, progress=progress, level=level)
+    return JsonResponse({'status': 'success'})
+
+
 @login_required
 def scenario_detail(request, scenario_id):
     scenario = get_object_or_404(Scenario, id=scenario_id)
@@ -237,11 +334,16 @@ def scenario_detail(request, scenario_id):
         screenshots__isnull=False
     ).exists()
 
+    start_job = None
+    if user_scenario:
+        start_job = user_scenario.start_jobs.filter(phase__in=ContainerStartJob.ACTIVE_PHASES).first()
+
     context = {
         'scenario': scenario,
         'group': group_scenario.group,
         'user_scenario': user_scenario,
         'has_completed': has_completed,
+        'start_job': start_job,
     }
     return render(request, 'ScenarioDetail.html', context)
 
@@ -257,63 +359,34 @@ def container_action(request, scenario_id):
             ).order_by('-id')[:1]
         )
 
-        docker_manager = DockerManager()
+        docker_manager = DockerManager(user_scenario.docker_host)
         try:
             if action == 'start':
-                if not user_scenario.container_id:
-                    container_name = f"{request.user.username}_{user_scenario.scenario.name}".replace(' ', '_').lower()
-                    container_id, port = docker_manager.start_container(
-                        user_scenario.scenario.docker_name,
-                        container_name
-                    )
-                    user_scenario.container_id = container_id
-                    user_scenario.port = port
-                    user_scenario.save()
-                    messages.success(request, 'Container started successfully')
-                else:
+                if user_scenario.container_id:
                     # Check if container actually exists and is running
-                    try:
-                        status = docker_manager.get_container_status(user_scenario.container_id)
-                        if status['status'] == 'error' or not status['container_status']['is_running']:
-                            # Container doesn't exist or isn't running, start a new one
-                            container_name = f"{request.user.username}_{user_scenario.scenario.name}".replace(' ',
-                                                                                                              '_').lower()
-                            container_id, port = docker_manager.start_container(
-                                user_scenario.scenario.docker_name,
-                                container_name
-                            )
-                            user_scenario.container_id = container_id
-                            user_scenario.port = port
-                            user_scenario.save()
-                            messages.success(request, 'Container started successfully')
-                        else:
-                            messages.info(request, 'Container is already running')
-                    except Exception as e:
-                        messages.error(request, f'Error checking container status: {str(e)}')
-                        user_scenario.container_id = None
-                        user_scenario.port = None
-                        user_scenario.save()
+                    status = docker_manager.get_container_status(user_scenario.container_id)
+                    if status['status'] == 'success' and status['container_status']['is_running']:
+                        messages.info(request, 'Container is already running')
+                        return redirect('scenario:scenario_detail', scenario_id=scenario_id)
+
+                job = submit_start_job(user_scenario)
+                return start_job_response(request, job, scenario_id)
 
             elif action == 'restart':
                 try:
                     if user_scenario.container_id:
                         docker_manager.restart_container(user_scenario.container_id)
+                        user_scenario.record_running()
+                        messages.success(request, 'Container restarted successfully')
                     else:
-                        container_name = f"{request.user.username}_{user_scenario.scenario.name}".replace(' ',
-                                                                                                          '_').lower()
-                        container_id, port = docker_manager.start_container(
-                            user_scenario.scenario.docker_name,
-                            container_name
-                        )
-                        user_scenario.container_id = container_id
-                        user_scenario.port = port
-                    user_scenario.save()
-                    messages.success(request, 'Container restarted successfully')
+                        job = submit_start_job(user_scenario)
+                        return start_job_response(request, job, scenario_id)
                 except Exception as e:
                     messages.error(request, str(e))
                     user_scenario.container_id = None
                     user_scenario.port = None
                     user_scenario.save()
+                    user_scenario.record_stopped()
 
             elif action == 'stop':
                 if not user_scenario.container_id:
@@ -324,6 +397,8 @@ def container_action(request, scenario_id):
                         user_scenario.container_id = None
                         user_scenario.port = None
                         user_scenario.save()
+                        user_scenario.record_stopped()
+                        dispatch_queued_jobs()
                         messages.success(request, 'Container stopped successfully')
                     except Exception as e:
                         messages.error(request, str(e))
@@ -333,6 +408,7 @@ def container_action(request, scenario_id):
                     messages.error(request, "Container is not running")
                 else:
                     docker_manager.pause_container(user_scenario.container_id)
+                    user_scenario.record_paused()
                     messages.success(request, 'Container paused successfully')
 
             elif action == 'unpause':
@@ -340,6 +416,7 @@ def container_action(request, scenario_id):
                     messages.error(request, "Container is not running")
                 else:
                     docker_manager.unpause_container(user_scenario.container_id)
+                    user_scenario.record_running()
                     messages.success(request, 'Container resumed successfully')
 
         except Exception as e:
@@ -349,199 +426,292 @@ def container_action(request, scenario_id):
                 user_scenario.container_id = None
                 user_scenario.port = None
                 user_scenario.save()
+                user_scenario.record_stopped()
 
     return redirect('scenario:scenario_detail', scenario_id=scenario_id)
 
 
-@login_required
-def get_container_status(request, scenario_id):
+def idle_status_payload(scenario_id, has_quiz, status='stopped', logs=''):
+    return {
+        'status': 'success',
+        'container_status': {
+            'status': status,
+            'is_paused': False,
+            'is_running': False,
+            'started_at': None,
+            'runtime': 0
+        },
+        'progress_info': {
+            'progress': 0,
+            'level': None,
+            'logs': logs
+        },
+        'quiz_url': reverse('quiz:TakeQuiz', args=[scenario_id]) if has_quiz else None
+    }
+
+
+def finish_status(user_scenario, status_info):
+    # Runtime comes from the row, which the daemon's view keeps honest
+    user_scenario.sync_state(status_info['container_status'])
+    status_info['container_status']['runtime'] = user_scenario.runtime
+    current_progress = status_info['progress_info']['progress']
+
+    if status_info['container_status']['is_paused']:
+        status_info['container_status']['status'] = 'paused'
+    elif current_progress >= 100 and status_info['container_status']['status'] == 'running':
+        status_info['container_status']['status'] = 'completed'
+    elif status_info['container_status']['is_running']:
+        status_info['container_status']['status'] = 'running'
+    return status_info
+
+
+def docker_error_payload(scenario_id, has_quiz, docker_error):
+    print(f"Docker error: {docker_error}")
+    payload = idle_status_payload(scenario_id, has_quiz, status='running', logs=str(docker_error))
+    payload['container_status']['is_running'] = True
+    return payload
+
+
+def container_status_payload(user, scenario_id, include_logs=False, logs_since=None):
     try:
         scenario = get_object_or_404(Scenario, id=scenario_id)
         has_quiz = Quiz.objects.filter(scenario=scenario).exists()
 
         user_scenario = UserScenario.objects.filter(
             scenario=scenario,
-            user=request.user
+            user=user
         ).order_by('-id').first()
 
-        if not user_scenario:
-            return JsonResponse({
-                'status': 'success',
-                'container_status': {
-                    'status': 'stopped',
-                    'is_paused': False,
-                    'is_running': False,
-                    'started_at': None,
-                    'runtime': 0
-                },
-                'progress_info': {
-                    'progress': 0,
-                    'level': None,
-                    'logs': ''
-                },
-                'quiz_url': reverse('quiz:TakeQuiz', args=[scenario_id]) if has_quiz else None
-            })
-
-        if user_scenario.container_id and user_scenario.port:
-            docker_manager = DockerManager()
+        if user_scenario and user_scenario.container_id and user_scenario.port:
+            docker_manager = DockerManager(user_scenario.docker_host)
             try:
-                status_info = docker_manager.get_container_status(user_scenario.container_id)
+                status_info = docker_manager.get_container_status(
+                    user_scenario.container_id,
+                    include_logs=include_logs,
+                    logs_since=logs_since
+                )
 
                 if status_info['status'] == 'success':
-                    current_progress = status_info['progress_info']['progress']
-
-                    if status_info['container_status']['is_paused']:
-                        status_info['container_status']['status'] = 'paused'
-                    elif current_progress >= 100 and status_info['container_status']['status'] == 'running':
-                        status_info['container_status']['status'] = 'completed'
-                    elif status_info['container_status']['is_running']:
-                        status_info['container_status']['status'] = 'running'
-
-                    return JsonResponse(status_info)
+                    return finish_status(user_scenario, status_info)
 
             except Exception as docker_error:
-                print(f"Docker error: {docker_error}")
-                return JsonResponse({
-                    'status': 'success',
-                    'container_status': {
-                        'status': 'running',
-                        'is_paused': False,
-                        'is_running': True,
-                        'started_at': None,
-                        'runtime': 0
-                    },
-                    'progress_info': {
-                        'progress': 0,
-                        'level': None,
-                        'logs': str(docker_error)
-                    },
-                    'quiz_url': reverse('quiz:TakeQuiz', args=[scenario_id]) if has_quiz else None
-                })
+                return docker_error_payload(scenario_id, has_quiz, docker_error)
 
-        return JsonResponse({
-            'status': 'success',
-            'container_status': {
-                'status': 'stopped',
-                'is_paused': False,
-                'is_running': False,
-                'started_at': None,
-                'runtime': 0
-            },
-            'progress_info': {
-                'progress': 0,
-                'level': None,
-                'logs': ''
-            },
-            'quiz_url': reverse('quiz:TakeQuiz', args=[scenario_id]) if has_quiz else None
-        })
+        return idle_status_payload(scenario_id, has_quiz)
 
     except Exception as e:
         print(f"General error: {e}")
-        return JsonResponse({
-            'status': 'success',
-            'container_status': {
-                'status': 'error',
-                'is_paused': False,
-                'is_running': False,
-                'started_at': None,
-                'runtime': 0
-            },
-            'progress_info': {
-                'progress': 0,
-                'level': None,
-                'logs': str(e)
-            },
-            'quiz_url': None
-        })
+        payload = idle_status_payload(scenario_id, False, status='error', logs=str(e))
+        payload['quiz_url'] = None
+        return payload
+
+
+class ContainerStatusStream:
+    # State behind one status stream. The UserScenario is resolved once; each
+    # tick reads the container state from the events-fed table and progress
+    # from the cache, so it costs no query and, with the progress channel, no
+    # Docker call. Containers without the channel have their logs read at most
+    # every STATUS_STREAM_LOG_INTERVAL seconds. Ticks run on the thread pool,
+    # not on the thread shared by every sync_to_async DB call.
+    def __init__(self, user, scenario_id):
+        self.user = user
+        self.scenario_id = scenario_id
+        self.has_quiz = False
+        self.user_scenario = None
+        self.next_log_read = 0
+        self.next_reload = 0
+
+    def load(self):
+        # DB work, run with thread_sensitive sync_to_async
+        scenario = Scenario.objects.filter(id=self.scenario_id).first()
+        self.has_quiz = scenario is not None and Quiz.objects.filter(scenario=scenario).exists()
+        self.user_scenario = UserScenario.objects.filter(
+            scenario_id=self.scenario_id,
+            user=self.user
+        ).select_related('scenario__level').order_by('-id').first()
+        self.next_reload = time.monotonic() + settings.STATUS_STREAM_LOG_INTERVAL
+
+    def needs_reload(self):
+        # A container started after the stream opened is picked up here
+        user_scenario = self.user_scenario
+        has_container = user_scenario and user_scenario.container_id and user_scenario.port
+        return not has_container and time.monotonic() >= self.next_reload
+
+    def tick(self):
+        # No DB access: runs with thread_sensitive=False. Returns the payload
+        # and whether it is a container status still to be finished.
+        user_scenario = self.user_scenario
+        if not (user_scenario and user_scenario.container_id and user_scenario.port):
+            return idle_status_payload(self.scenario_id, self.has_quiz), False
+
+        docker_manager = DockerManager(user_scenario.docker_host)
+        try:
+            state = None
+            if settings.DOCKER_EVENTS_WATCHER:
+                state = docker_manager.states.get(user_scenario.container_id)
+            if state is None:
+                # Table not synced yet: the lookup shared with pollers
+                status_info = docker_manager.get_container_status(user_scenario.container_id)
+            else:
+                read_logs = time.monotonic() >= self.next_log_read
+                if read_logs:
+                    self.next_log_read = time.monotonic() + settings.STATUS_STREAM_LOG_INTERVAL
+                status_info = docker_manager.build_status(user_scenario.container_id, state, read_logs=read_logs)
+        except Exception as docker_error:
+            return docker_error_payload(self.scenario_id, self.has_quiz, docker_error), False
+
+        if status_info['status'] != 'success':
+            return idle_status_payload(self.scenario_id, self.has_quiz), False
+        return status_info, True
+
+
+def stream_key(payload):
+    # Runtime ticks on the client, so it alone does not count as a change
+    container_status = payload['container_status']
+    progress_info = payload['progress_info']
+    return (
+        payload['status'],
+        container_status['status'],
+        container_status['is_paused'],
+        container_status['is_running'],
+        container_status['started_at'],
+        progress_info['progress'],
+        progress_info['level'],
+    )
+
+
+def status_etag(payload):
+    key = stream_key(payload) + (payload['progress_info'].get('log_cursor'),)
+    return hashlib.md5(repr(key).encode()).hexdigest()
+
+
+def next_poll_interval(payload):
+    # Poll fast only while something can still change on its own
+    container_status = payload['container_status']
+    if container_status['is_running'] and not container_status['is_paused'] \
+            and container_status['status'] != 'completed':
+        return settings.STATUS_POLL_INTERVAL
+    return settings.STATUS_POLL_IDLE_INTERVAL
+
+
+@login_required
+def get_container_status(request, scenario_id):
+    # Logs are only sent when asked for (?logs=1), or as the lines after the
+    # cursor from the previous response (?logs_since=<log_cursor>)
+    logs_since = request.GET.get('logs_since')
+    try:
+        logs_since = int(logs_since) if logs_since else None
+    except ValueError:
+        logs_since = None
+    include_logs = logs_since is not None or request.GET.get('logs') == '1'
+
+    payload = container_status_payload(request.user, scenario_id, include_logs, logs_since)
+    payload['poll_interval'] = next_poll_interval(payload)
+    etag = status_etag(payload)
+
+    response = get_conditional_response(request, etag=quote_etag(etag)) or JsonResponse(payload)
+    response['ETag'] = quote_etag(etag)
+    response['X-Poll-Interval'] = str(payload['poll_interval'])
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@login_required
+async def stream_container_status(request, scenario_id):
+    # Server-Sent Events version of get_container_status. Only a change in state,
+    # progress or level is pushed. Under WSGI the stream would be buffered, so the
+    # client is told to stop (204) and falls back to polling.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    stream = ContainerStatusStream(await request.auser(), scenario_id)
+    await sync_to_async(stream.load)()
+    tick = sync_to_async(stream.tick, thread_sensitive=False)
+
+    async def events():
+        yield f"retry: {settings.STATUS_STREAM_INTERVAL * 1000}\n\n"
+        last_key = None
+        last_sent = time.monotonic()
+        deadline = last_sent + settings.STATUS_STREAM_MAX_AGE
+        while time.monotonic() < deadline:
+            if stream.needs_reload():
+                await sync_to_async(stream.load)()
+            payload, is_container_status = await tick()
+            key = stream_key(payload)
+            if key != last_key:
+                if is_container_status:
+                    # Only a change in state can make the row's state stale
+                    payload = await sync_to_async(finish_status)(stream.user_scenario, payload)
+                last_key = key
+                last_sent = time.monotonic()
+                yield f"data: {json.dumps(payload)}\n\n"
+            elif time.monotonic() - last_sent >= settings.STATUS_STREAM_HEARTBEAT:
+                # Keeps proxies from closing an idle connection
+                last_sent = time.monotonic()
+                yield ": heartbeat\n\n"
+            await asyncio.sleep(settings.STATUS_STREAM_INTERVAL)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @login_required(login_url='account:login')
 def console(request):
     if request.user.is_staff:
-        # Get instructor's groups
-        instructor_groups = Group.objects.filter(staff=request.user)
-
-        # Admin dashboard data
-        total_users = instructor_groups.aggregate(
-            total_students=Count('students', distinct=True)
-        )['total_students'] or 0
-
-        # Get all scenarios from instructor's groups
-        group_scenarios = GroupScenario.objects.filter(
-            group__in=instructor_groups
-        ).select_related('group', 'scenario')
+        # Scenarios of students in the instructor's groups, for scenarios in those groups
+        student_scenarios = instructor_student_scenarios(request.user.id)
 
-        total_scenarios = group_scenarios.count()
-        total_groups = instructor_groups.count()
+        # Header counters are kept up to date by signals, see scenario/stats.py
+        stats = get_instructor_stats(request.user)
 
         # Get active student scenarios from instructor's groups
-        active_student_scenarios = UserScenario.objects.filter(
-            scenario__groups__group__in=instructor_groups,  # Scenario must be in instructor's group
-            user__joined_group__in=instructor_groups,  # Student must be in instructor's group
+        active_student_scenarios = student_scenarios.filter(
             completed_at__isnull=True,
             container_id__isnull=False
         ).select_related(
             'user',
-            'scenario'
-        ).distinct().order_by('-id')
+            'scenario__level'
+        ).order_by('-id')
 
         # Get container progress for active scenarios
-        docker_manager = DockerManager()
+        # One batch call per Docker host the containers are spread over
+        container_ids_by_host = defaultdict(list)
         for user_scenario in active_student_scenarios:
+            container_ids_by_host[user_scenario.docker_host].append(user_scenario.container_id)
+
+        statuses = {}
+        for host, container_ids in container_ids_by_host.items():
             try:
-                status_info = docker_manager.get_container_status(user_scenario.container_id)
-                if status_info['status'] == 'success':
-                    user_scenario.progress = status_info['progress_info']['progress']
-                else:
-                    user_scenario.progress = 0
-            except Exception:
+                statuses.update(DockerManager(host).get_container_statuses(container_ids))
+            except Exception as e:
+                print(f"Error getting container statuses on {host or 'default host'}: {e}")
+
+        for user_scenario in active_student_scenarios:
+            user_scenario.runtime_minutes = user_scenario.runtime // 60
+            status_info = statuses.get(user_scenario.container_id)
+            if status_info and status_info['status'] == 'success':
+                user_scenario.progress = status_info['progress_info']['progress']
+            else:
                 user_scenario.progress = 0
 
         # Get pending approvals for scenarios in instructor's groups
-        pending_approvals = UserScenario.objects.filter(
-            scenario__groups__group__in=instructor_groups,  # Scenario must be in instructor's group
-            user__joined_group__in=instructor_groups,  # Student must be in instructor's group
+        pending_approvals = student_scenarios.filter(
+            has_screenshots(),  # Must have screenshots
             approval_status='pending',  # Must be pending
-            completed_at__isnull=False,  # Must be completed
-            screenshots__isnull=False  # Must have screenshots
+            completed_at__isnull=False  # Must be completed
         ).select_related(
             'user',
             'scenario'
         ).prefetch_related(
             'screenshots'
-        ).distinct()
-
-        # Check each condition separately
-        all_user_scenarios = UserScenario.objects.all()
-
-        scenarios_in_groups = all_user_scenarios.filter(
-            scenario__groups__group__in=instructor_groups
-        )
-
-        users_in_groups = all_user_scenarios.filter(
-            user__joined_group__in=instructor_groups
-        )
-
-        pending_status = all_user_scenarios.filter(
-            approval_status='pending'
-        )
-
-        completed = all_user_scenarios.filter(
-            completed_at__isnull=False
-        )
-
-        with_screenshots = all_user_scenarios.filter(
-            screenshots__isnull=False
-        )
-
-        pending_approvals = pending_approvals.order_by('-completed_at')
+        ).order_by('-completed_at')
 
         # Get completed scenarios
-        completed_scenarios = UserScenario.objects.filter(
-            scenario__groups__group__in=instructor_groups,  # Scenario must be in instructor's group
-            user__joined_group__in=instructor_groups,  # Student must be in instructor's group
-            completed_at__isnull=False,  # Must be completed
-            screenshots__isnull=False  # Must have screenshots
+        completed_scenarios = student_scenarios.filter(
+            has_screenshots(),  # Must have screenshots
+            completed_at__isnull=False  # Must be completed
         ).select_related(
             'user',
             'scenario',
@@ -568,12 +738,14 @@ def console(request):
                     scenario=OuterRef('scenario')
                 ).values('rating')[:1]
             )
-        ).distinct().order_by('-completed_at')
+        ).order_by('-completed_at')
 
         context = {
-            'total_users': total_users,
-            'total_scenarios': total_scenarios,
-            'total_groups': total_groups,
+            'total_users': stats.total_students,
+            'total_scenarios': stats.total_scenarios,
+            'total_groups': stats.total_groups,
+            'pending_count': stats.pending_approvals,
+            'completed_count': stats.completed_scenarios,
             'active_student_scenarios': active_student_scenarios,
             'pending_approvals': pending_approvals,
             'completed_scenarios': completed_scenarios
@@ -607,6 +779,104 @@ def console(request):
     return render(request, 'Console.html', context)
 
 
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def warm_pool_status(request):
+    images = set(Scenario.objects.values_list('docker_name', flat=True)) | set(settings.WARM_POOL_SIZES)
+    return JsonResponse({
+        'status': 'success',
+        'pools': warm_pool.stats(sorted(images))
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def resource_usage(request):
+    # Sampled CPU, memory, network and block I/O series for the given
+    # user scenarios (?user_scenario=<id>, repeatable), or for every running
+    # one. ?history=1 adds the rollups of containers that have stopped.
+    user_scenarios = UserScenario.objects.all()
+    ids = request.GET.getlist('user_scenario')
+    if ids:
+        try:
+            user_scenarios = user_scenarios.filter(id__in=[int(user_scenario_id) for user_scenario_id in ids])
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid user scenario id'}, status=400)
+    else:
+        user_scenarios = user_scenarios.filter(container_id__isnull=False)
+    user_scenarios = list(user_scenarios.values('id', 'docker_host', 'container_id'))
+
+    series = resource_sampler.series_many(
+        (user_scenario['docker_host'] or settings.DEFAULT_DOCKER_HOST, user_scenario['container_id'])
+        for user_scenario in user_scenarios if user_scenario['container_id']
+    )
+    containers = {}
+    for user_scenario in user_scenarios:
+        key = (user_scenario['docker_host'] or settings.DEFAULT_DOCKER_HOST, user_scenario['container_id'])
+        containers[user_scenario['id']] = {
+            'container_id': user_scenario['container_id'],
+            'series': series[key].to_dict() if key in series else None,
+        }
+
+    if request.GET.get('history') == '1':
+        rollups = ContainerResourceRollup.objects.filter(
+            user_scenario_id__in=containers.keys()
+        ).values(
+            'user_scenario_id', 'container_id', 'started_at', 'ended_at', 'samples',
+            'cpu_percent_avg', 'cpu_percent_max', 'memory_bytes_max', 'series'
+        )
+        for rollup in rollups:
+            containers[rollup.pop('user_scenario_id')].setdefault('history', []).append(rollup)
+
+    return JsonResponse({
+        'status': 'success',
+        'interval': settings.RESOURCE_SAMPLE_INTERVAL,
+        'containers': containers
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def status_cache_stats(request):
+    return JsonResponse({
+        'status': 'success',
+        'cache': status_cache.stats()
+    })
+
+
+def metrics(request):
+    # Scraped by Prometheus with METRICS_TOKEN as bearer token, or opened by
+    # a logged-in administrator
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    allowed = request.user.is_superuser or (settings.METRICS_TOKEN and secrets.compare_digest(token, settings.METRICS_TOKEN))
+    if not allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4')
+
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def start_metrics_page(request):
+    data = start_metrics()
+    phases = []
+    for phase, histogram in data['phases'].items():
+        phases.append({
+            'name': phase,
+            'count': histogram['count'],
+            'average': histogram['sum'] / histogram['count'] if histogram['count'] else None,
+            'p50': histogram['p50'],
+            'p95': histogram['p95'],
+            'p99': histogram['p99'],
+        })
+    attempts = data['attempts']
+    return render(request, 'Admin/StartMetrics.html', {
+        'phases': phases,
+        'outcomes': data['outcomes'],
+        'attempts': attempts,
+        'average_attempts': attempts['sum'] / attempts['count'] if attempts['count'] else None,
+    })
+
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
 def approve_scenario(request, scenario_id, user_id):
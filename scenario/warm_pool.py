@@ -0,0 +1,137 @@
+import re
+import secrets
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+
+POOL_LABEL = 'cyberrange.warm_pool'
+WARM_PREFIX = 'warm_'
+
+
+def _container_name(container):
+    # Sparse listings only carry "Names", not "Name"
+    names = container.attrs.get('Names') or [container.attrs.get('Name', '')]
+    return names[0].lstrip('/')
+
+
+class WarmPool:
+    # Keeps idle, already booted containers per image. A container is handed
+    # over by moving its port reservation to the student's container name (the
+    # database update decides which worker wins) and then renaming it.
+    def __init__(self, manager_class):
+        self.manager_class = manager_class
+        self._lock = threading.Lock()
+        self._refilling = set()
+
+    def target_size(self, image_name):
+        return settings.WARM_POOL_SIZES.get(image_name, settings.WARM_POOL_DEFAULT_SIZE)
+
+    def idle_containers(self, image_name, host=None):
+        client = self.manager_class(host).client
+        containers = client.containers.list(
+            sparse=True,
+            filters={'label': f'{POOL_LABEL}={image_name}', 'status': 'running'},
+        )
+        return [c for c in containers if _container_name(c).startswith(WARM_PREFIX)]
+
+    def acquire(self, image_name, container_name, limits=None, host=None):
+        if self.target_size(image_name) <= 0:
+            return None
+
+        manager = self.manager_class(host)
+        acquired = None
+        try:
+            for container in self.idle_containers(image_name, host):
+                port = manager.ports.transfer(_container_name(container), container_name)
+                if port is None:
+                    continue
+                try:
+                    container.rename(container_name)
+                    manager.apply_limits(container, limits)
+                except Exception as e:
+                    print(f"Error handing over warm container: {e}")
+                    manager.ports.release(container_name=container_name)
+                    try:
+                        container.remove(force=True)
+                    except Exception:
+                        pass
+                    continue
+                acquired = (container.id, port)
+                break
+        except Exception as e:
+            print(f"Error acquiring warm container: {e}")
+
+        self._count(image_name, 'hits' if acquired else 'misses')
+        self.refill_async(image_name, manager.host)
+        return acquired
+
+    def refill(self, image_name, host=None):
+        missing = self.target_size(image_name) - len(self.idle_containers(image_name, host))
+        if missing <= 0:
+            return 0
+
+        manager = self.manager_class(host)
+        slug = re.sub(r'[^a-zA-Z0-9_.-]', '_', image_name)
+        for _ in range(missing):
+            name = f"{WARM_PREFIX}{slug}_{secrets.token_hex(4)}"
+            port = manager.ports.reserve(name)
+            try:
+                # Idle containers hold the default limits, which admission counts
+                manager.run_container(
+                    image_name, name, port,
+                    labels={POOL_LABEL: image_name},
+                    limits=settings.CONTAINER_LIMITS['default'],
+                )
+            except Exception:
+                manager.ports.release(container_name=name)
+                raise
+        return missing
+
+    def refill_async(self, image_name, host=None):
+        key = (image_name, host)
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        threading.Thread(
+            target=self._refill_worker,
+            args=(image_name, host),
+            name=f'warm-pool-refill-{image_name}',
+            daemon=True,
+        ).start()
+
+    def _refill_worker(self, image_name, host):
+        try:
+            self.refill(image_name, host)
+        except Exception as e:
+            print(f"Error refilling warm pool for {image_name} on {host}: {e}")
+        finally:
+            connection.close()
+            with self._lock:
+                self._refilling.discard((image_name, host))
+
+    def _count(self, image_name, counter):
+        key = f'warm_pool:{counter}:{image_name}'
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+    def stats(self, image_names):
+        stats = {}
+        for image_name in image_names:
+            try:
+                idle = sum(len(self.idle_containers(image_name, host)) for host in settings.DOCKER_HOSTS)
+            except Exception:
+                idle = None
+            stats[image_name] = {
+                'target': self.target_size(image_name),
+                'idle': idle,
+                'hits': cache.get(f'warm_pool:hits:{image_name}', 0),
+                'misses': cache.get(f'warm_pool:misses:{image_name}', 0),
+            }
+        return stats
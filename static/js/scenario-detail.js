@@ -1,8 +1,14 @@
 class ScenarioManager {
-    constructor(scenarioId, statusUrl) {
+    constructor(scenarioId, statusUrl, jobUrl, streamUrl) {
         this.scenarioId = scenarioId;
         this.statusUrl = statusUrl;
+        this.jobUrl = jobUrl;
+        this.streamUrl = streamUrl;
+        this.eventSource = null;
+        this.etag = null;
+        this.polling = false;
         this.updateInterval = 3000;
+        this.jobInterval = 2000;
         this.intervalId = null;
         this.runtimeIntervalId = null;
         this.currentRuntime = 0;
@@ -26,22 +32,121 @@ class ScenarioManager {
         }
         
         const statusBox = document.querySelector('.scenario_status_box');
+        if (statusBox && statusBox.dataset.runtime) {
+            // Known from the database before the first status arrives
+            this.currentRuntime = parseInt(statusBox.dataset.runtime, 10) || 0;
+            this.containerRuntime.textContent = this.formatRuntime(this.currentRuntime);
+        }
         if (statusBox && statusBox.dataset.completed === 'true') {
             this.checkCompletionStatus();
         }
     }
 
     init() {
+        if (this.jobUrl) {
+            this.pollJob();
+        }
         this.updateStatus();
-        this.intervalId = setInterval(() => this.updateStatus(), this.updateInterval);
+        if (this.streamUrl && window.EventSource) {
+            this.openStream();
+        } else {
+            this.startPolling();
+        }
         this.runtimeIntervalId = setInterval(() => this.updateRuntime(), 1000);
     }
 
-    async updateStatus() {
+    startPolling() {
+        if (!this.polling) {
+            this.polling = true;
+            this.schedulePoll(this.updateInterval);
+        }
+    }
+
+    schedulePoll(delay) {
+        // The server suggests the next interval (slower once nothing is running)
+        this.intervalId = setTimeout(async () => {
+            const nextInterval = await this.updateStatus();
+            if (this.polling) {
+                this.schedulePoll(nextInterval || this.updateInterval);
+            }
+        }, delay);
+    }
+
+    openStream() {
+        // The server only pushes when status, progress or level changes
+        this.eventSource = new EventSource(this.streamUrl);
+        this.eventSource.onmessage = (event) => {
+            if (!this.jobUrl) {
+                this.handleStatus(JSON.parse(event.data));
+            }
+        };
+        this.eventSource.onerror = () => {
+            // CLOSED means the browser gave up (e.g. 204 when not served over ASGI)
+            if (this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                this.etag = null;
+                this.polling = false;
+                this.startPolling();
+            }
+        };
+    }
+
+    async pollJob() {
         try {
-            const response = await fetch(this.statusUrl);
+            const response = await fetch(this.jobUrl);
             const data = await response.json();
 
+            if (data.phase === 'ready') {
+                const accessBtn = document.querySelector('.access-btn');
+                if (accessBtn && data.desktop_url) {
+                    accessBtn.href = data.desktop_url;
+                }
+                this.jobUrl = null;
+                this.updateStatus();
+                return;
+            }
+
+            if (data.phase === 'failed') {
+                this.jobUrl = null;
+                Swal.fire('Error', data.error || 'Failed to start scenario', 'error');
+                return;
+            }
+
+            if (this.containerStatus) {
+                this.containerStatus.textContent = data.queue_position
+                    ? `Queued (#${data.queue_position})`
+                    : this.formatStatus(data.phase);
+                this.containerStatus.className = 'status-badge status-stopped';
+            }
+        } catch (error) {
+            console.error('Error checking start job:', error);
+        }
+        setTimeout(() => this.pollJob(), this.jobInterval);
+    }
+
+    async updateStatus() {
+        if (this.jobUrl) {
+            return;
+        }
+        try {
+            const headers = this.etag ? {'If-None-Match': this.etag} : {};
+            const response = await fetch(this.statusUrl, {headers});
+            const pollInterval = parseInt(response.headers.get('X-Poll-Interval'), 10) * 1000;
+            if (response.status !== 304) {
+                this.etag = response.headers.get('ETag');
+                await this.handleStatus(await response.json());
+            }
+            return pollInterval || null;
+        } catch (error) {
+            if (!this.hasError) {
+                this.hasError = true;
+                this.showError();
+            }
+        }
+    }
+
+    async handleStatus(data) {
+        try {
             if (data.status === 'success') {
                 if (data.container_status.runtime !== undefined) {
                     this.currentRuntime = data.container_status.runtime;
@@ -126,7 +231,10 @@ class ScenarioManager {
             'paused': 'Paused',
             'completed': 'Completed',
             'error': 'Error',
-            'stopped': 'Stopped'
+            'stopped': 'Stopped',
+            'queued': 'Queued',
+            'creating': 'Creating',
+            'starting': 'Starting'
         };
         return statusMap[status.toLowerCase()] || status;
     }
@@ -153,8 +261,12 @@ class ScenarioManager {
     }
 
     destroy() {
+        this.polling = false;
         if (this.intervalId) {
-            clearInterval(this.intervalId);
+            clearTimeout(this.intervalId);
+        }
+        if (this.eventSource) {
+            this.eventSource.close();
         }
         if (this.runtimeIntervalId) {
             clearInterval(this.runtimeIntervalId);